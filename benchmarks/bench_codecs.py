@@ -0,0 +1,56 @@
+"""
+Codec Benchmark
+Bytes/message and encode/decode rates of the JSON and binary wire formats
+
+Usage: python benchmarks/bench_codecs.py [--messages 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.generator import TelemetryGeneratorService
+from services.generator.generator_service import BATCH_KINDS
+from shared.codecs import BINARY_ENCODING, JSON_ENCODING, decode_payload, encode_payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    generator = TelemetryGeneratorService(pubsub=None, seed=args.seed)
+
+    print(f"{'topic':<18} {'encoding':<10} {'bytes/msg':>10} {'encode/s':>12} {'decode/s':>12} {'decode/s int-ts':>16}")
+    print("-" * 83)
+    for kind, topic_id in BATCH_KINDS.items():
+        records = generator.generate_batch(kind, args.messages, output='dicts')
+        for encoding in (JSON_ENCODING, BINARY_ENCODING):
+            # Producer side
+            start = time.perf_counter()
+            encoded = [encode_payload(topic_id, record, encoding) for record in records]
+            encode_rate = len(records) / (time.perf_counter() - start)
+
+            # Consumer side
+            start = time.perf_counter()
+            for data, attributes in encoded:
+                decode_payload(data, attributes)
+            decode_rate = len(records) / (time.perf_counter() - start)
+
+            # Consumer side keeping epoch-micros timestamps (JSON has no such mode)
+            start = time.perf_counter()
+            for data, attributes in encoded:
+                decode_payload(data, attributes, iso_timestamps=False)
+            raw_rate = len(records) / (time.perf_counter() - start)
+
+            size = sum(len(data) for data, _ in encoded) / len(encoded)
+            print(f"{topic_id:<18} {encoding:<10} {size:>10.1f} {encode_rate:>12,.0f} "
+                  f"{decode_rate:>12,.0f} {raw_rate:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Loader Benchmark
+Rows/sec of COPY (text, binary) versus execute_values INSERT across batch sizes
+
+Usage:
+  python benchmarks/bench_loader.py --rows 100000 --batch-sizes 500,5000,50000   # loads via DB_* variables
+  python benchmarks/bench_loader.py --encode-only                               # client-side COPY encoding only
+
+Each run loads into the transformer's tables inside a transaction that is
+rolled back, so the benchmark leaves no rows behind. Generated rows have
+distinct timestamps, so they satisfy the tables' natural-key unique indexes.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from services.generator import TelemetryGeneratorService
+from services.generator.generator_service import BATCH_KINDS
+from services.transformer.copy_loader import COPY_FORMATS, CopyLoader
+from services.transformer.transformer_service import DataTransformerService
+
+
+def transformed_records(kind, rows, seed):
+    """Rows as the transformer loads them"""
+    generator = TelemetryGeneratorService(pubsub=None, seed=seed)
+    records = generator.generate_batch(kind, rows, output='dicts')
+    # transform_* use no connection or store
+    transformer = DataTransformerService.__new__(DataTransformerService)
+    topic_id = BATCH_KINDS[kind]
+    return topic_id, getattr(transformer, f"transform_{topic_id}")(records)
+
+
+def connect():
+    return psycopg2.connect(
+        host=os.environ['DB_HOST'],
+        port=os.getenv('DB_PORT', 5432),
+        database=os.environ['DB_NAME'],
+        user=os.environ['DB_USER'],
+        password=os.environ['DB_PASSWORD']
+    )
+
+
+def load_values(cursor, table_name, records):
+    columns = list(records[0].keys())
+    values = (tuple(record[col] for col in columns) for record in records)
+    execute_values(cursor, f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s", values, page_size=1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--batch-sizes', default='500,5000,50000')
+    parser.add_argument('--kind', choices=list(BATCH_KINDS), default='server')
+    parser.add_argument('--encode-only', action='store_true', help='measure COPY encoding without a database')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    topic_id, records = transformed_records(args.kind, args.rows, args.seed)
+    columns = list(records[0].keys())
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+
+    methods = [(f"copy-{copy_format}", CopyLoader(copy_format)) for copy_format in COPY_FORMATS]
+    conn = None
+    if not args.encode_only:
+        conn = connect()
+        methods.append(('values', None))
+
+    print(f"{topic_id}: {len(records):,} rows{' (encoding only)' if args.encode_only else ''}")
+    print(f"{'method':<12} {'batch':>8} {'rows/s':>12} {'MB sent':>9}")
+    print("-" * 44)
+    for name, loader in methods:
+        for batch_size in batch_sizes:
+            sent = 0
+            cursor = conn.cursor() if conn else None
+            start = time.perf_counter()
+            for offset in range(0, len(records), batch_size):
+                batch = records[offset:offset + batch_size]
+                if loader is None:
+                    load_values(cursor, topic_id, batch)
+                elif conn is None:
+                    sent += len(loader.encode(topic_id, columns, batch))
+                else:
+                    payload = loader.encode(topic_id, columns, batch)
+                    sent += len(payload)
+                    cursor.copy_expert(loader.statement(topic_id, columns), io.BytesIO(payload))
+            elapsed = time.perf_counter() - start
+            if conn:
+                conn.rollback()
+            sent_mb = f"{sent / 1e6:>9.1f}" if sent else f"{'-':>9}"
+            print(f"{name:<12} {batch_size:>8,} {len(records) / elapsed:>12,.0f} {sent_mb}")
+
+    if conn:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
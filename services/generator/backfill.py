@@ -0,0 +1,318 @@
+"""
+Historical Backfill
+Synthesizes days of time-ordered telemetry straight into storage, skipping Pub/Sub
+
+Usage:
+  python services/generator/backfill.py --days 30 --out ./data/backfill --layout segments
+  python services/generator/backfill.py --days 30 --postgres   # uses DB_* variables
+  python services/generator/backfill.py --days 7 --end 2024-06-01T00:00:00   # reproducible window
+"""
+
+import argparse
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from services.generator.generator_service import BATCH_KINDS, TelemetryGeneratorService
+from shared.manifest import encode_manifest, manifest_path, segment_entry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HOUR_SECONDS = 3600
+
+# Column order of the transformer's output tables (derived columns included)
+TABLE_COLUMNS = {
+    "server": [
+        "timestamp", "server_id", "region", "environment", "cpu_percent", "memory_percent",
+        "memory_used_gb", "memory_total_gb", "disk_used_gb", "disk_total_gb",
+        "disk_utilization", "status"
+    ],
+    "container": [
+        "timestamp", "container_id", "service_name", "version", "environment", "cpu_percent",
+        "memory_mb", "memory_limit_mb", "memory_utilization", "requests_per_sec",
+        "response_time_ms", "error_count", "restart_count", "health"
+    ],
+    "service": [
+        "timestamp", "service_name", "version", "environment", "region", "total_requests",
+        "failed_requests", "success_rate", "error_rate_percent", "avg_response_time_ms",
+        "p95_response_time_ms", "instances_running", "cpu_avg_percent", "memory_avg_percent"
+    ]
+}
+
+
+def _add_derived_columns(kind, columns):
+    """Vectorized equivalent of the transformer's derived metrics"""
+    if kind == "server":
+        columns["disk_utilization"] = np.round(columns["disk_used_gb"] / columns["disk_total_gb"] * 100, 2)
+    elif kind == "container":
+        columns["memory_utilization"] = np.round(columns["memory_mb"] / columns["memory_limit_mb"] * 100, 2)
+    elif kind == "service":
+        total = columns["total_requests"]
+        columns["success_rate"] = np.round((total - columns["failed_requests"]) / total * 100, 2)
+    return columns
+
+
+def columns_to_copy_text(kind, columns) -> bytes:
+    """Render a columnar batch in COPY text format for the kind's table"""
+    rendered = []
+    for name in TABLE_COLUMNS[kind]:
+        column = columns[name]
+        if name == "timestamp":
+            rendered.append(np.datetime_as_string(column, unit="us").tolist())
+        else:
+            rendered.append(list(map(str, column.tolist())))
+    return "".join("\t".join(row) + "\n" for row in zip(*rendered)).encode("utf-8")
+
+
+def _hour_task(task):
+    """Generate one hour of one metric kind; runs in a worker process"""
+    kind, hour_index, config = task
+    kind_index = list(BATCH_KINDS).index(kind)
+    start = np.datetime64(config["start"], "us")
+    end = np.datetime64(config["end"], "us")
+    interval_us = int(config["interval_seconds"] * 1_000_000)
+
+    # Per-entity phases depend only on the seed, per-hour values on (seed, kind, hour)
+    generator = TelemetryGeneratorService(None, seed=[config["seed"], kind_index, hour_index])
+    generator.configure_fleet(servers=config["servers"], containers=config["containers"])
+    entities = np.asarray(generator.entities(kind), dtype=object)
+    phases = np.random.default_rng([config["seed"], kind_index]).integers(0, interval_us, len(entities))
+
+    hour_start = start + np.timedelta64(hour_index * HOUR_SECONDS, "s")
+    hour_end = min(hour_start + np.timedelta64(HOUR_SECONDS, "s"), end)
+    offset_us = int((hour_start - start) / np.timedelta64(1, "us"))
+    first_step = offset_us // interval_us - 1
+    last_step = -(-(offset_us + HOUR_SECONDS * 1_000_000) // interval_us)
+
+    steps = np.arange(first_step, last_step + 1, dtype=np.int64)
+    times = start + (steps[:, None] * interval_us + phases[None, :]).astype("timedelta64[us]")
+    entity_index = np.broadcast_to(np.arange(len(entities)), times.shape)
+
+    mask = (times >= hour_start) & (times < hour_end)
+    times = times[mask]
+    entity_index = entity_index[mask]
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+    entity_index = entity_index[order]
+
+    n = times.size
+    if n == 0:
+        return kind, hour_index, 0, b""
+
+    if config["target"] == "postgres":
+        columns = generator.generate_batch(kind, n, timestamps=times, entity_ids=entities[entity_index])
+        payload = columns_to_copy_text(kind, _add_derived_columns(kind, columns))
+    else:
+        payload = generator.generate_batch(kind, n, output="json", timestamps=times,
+                                           entity_ids=entities[entity_index])
+
+    if config["target"] == "segments":
+        # Each worker writes its own immutable hourly segment
+        hour = hour_start.astype(datetime)
+        directory = os.path.join(
+            config["out"], BATCH_KINDS[kind], f"dt={hour:%Y-%m-%d}", f"hr={hour:%H}"
+        )
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "backfill-00000.jsonl"), "wb") as f:
+            f.write(payload)
+
+        # Manifest next to ingestion's, so the transformer finds the hour by its time bounds
+        topic_id = BATCH_KINDS[kind]
+        partition = f"dt={hour:%Y-%m-%d}/hr={hour:%H}"
+        entry = segment_entry(f"{topic_id}/{partition}/backfill-00000.jsonl", payload, n,
+                              str(times[0]), str(times[-1]))
+        manifest = os.path.join(config["out"], manifest_path(topic_id, partition, "backfill"))
+        os.makedirs(os.path.dirname(manifest), exist_ok=True)
+        with open(manifest, "wb") as f:
+            f.write(encode_manifest(topic_id, partition, "backfill", [entry]))
+        return kind, hour_index, n, b""
+
+    return kind, hour_index, n, payload
+
+
+class BackfillJob:
+    """Generates N days of history in parallel across cores
+
+    target:
+      "jsonl"    - one <topic>.jsonl per topic under out, like ingestion's blobs
+      "segments" - <topic>/dt=YYYY-MM-DD/hr=HH/backfill-00000.jsonl partitions (with manifests)
+      "postgres" - COPY rows (derived columns included) into the metric tables; rows
+                   already there (same natural key) are skipped, so reruns are idempotent
+    Output is identical for a given seed and end regardless of worker count;
+    end defaults to the current hour.
+    """
+
+    def __init__(self, days, target="jsonl", out="./data/backfill", seed=42, workers=None,
+                 servers=None, containers=None, interval_seconds=300, end=None, db_config=None):
+        self.days = days
+        self.target = target
+        self.out = out
+        self.seed = seed
+        self.workers = workers or os.cpu_count()
+        self.db_config = db_config
+
+        end = end or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=days)
+        self.config = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "interval_seconds": interval_seconds,
+            "seed": seed,
+            "servers": servers,
+            "containers": containers,
+            "target": target,
+            "out": out
+        }
+        self.hours = days * 24
+        self.counts = {kind: 0 for kind in BATCH_KINDS}
+        self.skipped = {kind: 0 for kind in BATCH_KINDS}
+
+    def run(self):
+        """Run the backfill and return records written per kind"""
+        started = time.perf_counter()
+        logger.info(f"⏪ Backfilling {self.days} days ({self.config['start']} → {self.config['end']}) "
+                    f"to {self.target} with {self.workers} workers, seed {self.seed}")
+        logger.info(f"   Rerun with --seed {self.seed} --end {self.config['end']} to reproduce it")
+
+        sinks = self._open_sinks()
+        context = multiprocessing.get_context("spawn")
+        try:
+            with context.Pool(self.workers) as pool:
+                for kind in BATCH_KINDS:
+                    tasks = [(kind, hour, self.config) for hour in range(self.hours)]
+                    # imap keeps hour order so sequential sinks stay time-ordered
+                    for _, _, n, payload in pool.imap(_hour_task, tasks, chunksize=4):
+                        self.counts[kind] += n
+                        if payload:
+                            sinks[kind](payload)
+                    logger.info(f"  {BATCH_KINDS[kind]}: {self.counts[kind]} records")
+                    if self.skipped[kind]:
+                        logger.info(f"  {BATCH_KINDS[kind]}: {self.skipped[kind]} already loaded, skipped")
+        finally:
+            self._close_sinks()
+
+        elapsed = time.perf_counter() - started
+        total = sum(self.counts.values())
+        logger.info(f"✅ Backfill complete: {total} records in {elapsed:.1f}s ({total / elapsed:,.0f} records/sec)")
+        return dict(self.counts)
+
+    def _open_sinks(self):
+        self._files = []
+        self._conn = None
+
+        if self.target == "jsonl":
+            os.makedirs(self.out, exist_ok=True)
+            sinks = {}
+            for kind, topic_id in BATCH_KINDS.items():
+                f = open(os.path.join(self.out, f"{topic_id}.jsonl"), "wb")
+                self._files.append(f)
+                sinks[kind] = f.write
+            return sinks
+
+        if self.target == "postgres":
+            import psycopg2
+
+            self._conn = psycopg2.connect(
+                host=self.db_config['host'],
+                port=self.db_config.get('port', 5432),
+                database=self.db_config['database'],
+                user=self.db_config['user'],
+                password=self.db_config['password']
+            )
+            cursor = self._conn.cursor()
+
+            def copy_sink(kind):
+                # Staged, then merged on the tables' natural-key indexes so a rerun skips loaded rows
+                table_name = BATCH_KINDS[kind]
+                stage = f"stage_{table_name}"
+                columns = ', '.join(TABLE_COLUMNS[kind])
+                cursor.execute(f"CREATE TEMP TABLE {stage} AS SELECT {columns} FROM {table_name} WITH NO DATA")
+
+                def sink(payload):
+                    cursor.copy_expert(f"COPY {stage} ({columns}) FROM STDIN", io.BytesIO(payload))
+                    cursor.execute(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {stage} "
+                                   f"ON CONFLICT DO NOTHING")
+                    self.skipped[kind] += payload.count(b"\n") - cursor.rowcount
+                    cursor.execute(f"TRUNCATE {stage}")
+                return sink
+
+            return {kind: copy_sink(kind) for kind in BATCH_KINDS}
+
+        if self.target == "segments":
+            return {}
+
+        raise ValueError(f"Unknown backfill target: {self.target}")
+
+    def _close_sinks(self):
+        for f in self._files:
+            f.close()
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+
+
+def _utc_timestamp(value):
+    """Naive UTC datetime of an ISO timestamp ('Z' or an offset allowed)"""
+    try:
+        parsed = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO timestamp: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthesize historical telemetry")
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--out', default='./data/backfill', help='output directory for jsonl/segments')
+    parser.add_argument('--layout', choices=['jsonl', 'segments'], default='jsonl')
+    parser.add_argument('--postgres', action='store_true', help='COPY into the metric tables instead')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--servers', type=int, default=None, help='fleet size (default: generator servers)')
+    parser.add_argument('--containers', type=int, default=None, help='fleet size (default: generator containers)')
+    parser.add_argument('--interval', type=float, default=300, help='seconds between reports per entity')
+    parser.add_argument('--end', type=_utc_timestamp, default=None,
+                        help='end of the window, ISO UTC timestamp (default: the current hour)')
+    args = parser.parse_args()
+
+    db_config = None
+    if args.postgres:
+        db_config = {
+            'host': os.getenv('DB_HOST'),
+            'port': os.getenv('DB_PORT', 5432),
+            'database': os.getenv('DB_NAME'),
+            'user': os.getenv('DB_USER'),
+            'password': os.getenv('DB_PASSWORD')
+        }
+        if not all([db_config['host'], db_config['database'], db_config['user'], db_config['password']]):
+            logger.error("❌ Missing DB_HOST, DB_NAME, DB_USER or DB_PASSWORD")
+            sys.exit(1)
+
+    job = BackfillJob(
+        args.days,
+        target='postgres' if args.postgres else args.layout,
+        out=args.out,
+        seed=args.seed,
+        workers=args.workers,
+        servers=args.servers,
+        containers=args.containers,
+        interval_seconds=args.interval,
+        end=args.end,
+        db_config=db_config
+    )
+    job.run()
+
+
+if __name__ == "__main__":
+    main()
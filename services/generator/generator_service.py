@@ -7,12 +7,37 @@ import json
 import random
 from datetime import datetime
 
+import numpy as np
+
+from shared.envelope import pack_records
+
+
+# Batch kinds mapped to the topic they are published on
+BATCH_KINDS = {
+    "server": "server_metrics",
+    "container": "container_metrics",
+    "service": "service_metrics"
+}
+
+# Column holding the reporting entity of each batch kind
+ENTITY_COLUMNS = {
+    "server": "server_id",
+    "container": "container_id",
+    "service": "service_name"
+}
+
 
 class TelemetryGeneratorService:
     """Generate telemetry data and publish to GCP Pub/Sub"""
     
-    def __init__(self, pubsub):
+    def __init__(self, pubsub, seed=None, envelope_records=1, envelope_bytes=256_000, compression=None):
         self.pubsub = pubsub
+        self.rng = np.random.default_rng(seed)
+        
+        # Envelope packing for batch publishing (1 record = one message per metric)
+        self.envelope_records = envelope_records
+        self.envelope_bytes = envelope_bytes
+        self.compression = compression
         
         # Configuration - Optimized for database preservation
         self.services = ["API", "DB", "Cache"]  # Reduced from 4 to 3
@@ -23,6 +48,8 @@ class TelemetryGeneratorService:
         self.service_versions = ["v2.0.0"]  # Single version
         
         self.generated_count = 0
+        # Batch timestamps never repeat, so every record keeps its own (entity, timestamp) key
+        self._next_timestamp = np.datetime64(0, "us")
     
     def generate_server_metric(self) -> dict:
         """Generate a single server metric"""
@@ -83,6 +110,168 @@ class TelemetryGeneratorService:
             "memory_avg_percent": round(random.uniform(30, 80), 2)
         }
     
+    def configure_fleet(self, servers=None, containers=None):
+        """Replace the simulated entity population with a fleet of the given size"""
+        if servers:
+            width = max(2, len(str(servers)))
+            self.servers = [f"server-{i:0{width}d}" for i in range(1, servers + 1)]
+        if containers:
+            width = max(2, len(str(containers)))
+            self.containers = [f"container-{i:0{width}d}" for i in range(1, containers + 1)]
+
+    def entities(self, kind) -> list:
+        """Entity IDs reporting metrics of a batch kind"""
+        return {
+            "server": self.servers,
+            "container": self.containers,
+            "service": self.services
+        }[kind]
+
+    def generate_batch(self, kind, n, output="columns", timestamps=None, entity_ids=None):
+        """Generate n metrics of one kind at once
+
+        kind: "server", "container" or "service".
+        output: "columns" returns a dict of NumPy arrays, "dicts" returns a
+        list of records identical in shape to the generate_*_metric methods,
+        "json" returns the records encoded as JSONL bytes.
+        timestamps: optional datetime64 array of length n; defaults to now,
+        one microsecond apart and after those of any earlier batch.
+        entity_ids: optional array of n reporting entities; random otherwise.
+        """
+        builders = {
+            "server": self._server_columns,
+            "container": self._container_columns,
+            "service": self._service_columns
+        }
+        if kind not in builders:
+            raise ValueError(f"Unknown metric kind: {kind}")
+
+        if timestamps is None:
+            timestamps = self._batch_timestamps(n)
+        columns = builders[kind](n, np.asarray(timestamps, dtype="datetime64[us]"))
+        if entity_ids is not None:
+            columns[ENTITY_COLUMNS[kind]] = np.asarray(entity_ids, dtype=object)
+
+        if output == "columns":
+            return columns
+        if output == "dicts":
+            return self.columns_to_dicts(columns)
+        if output == "json":
+            return self.columns_to_jsonl(columns)
+        raise ValueError(f"Unknown output format: {output}")
+
+    @staticmethod
+    def columns_to_dicts(columns) -> list:
+        """Convert a columnar batch into a list of metric dicts"""
+        names = list(columns)
+        values = []
+        for name in names:
+            column = columns[name]
+            if name == "timestamp":
+                values.append([ts + "Z" for ts in np.datetime_as_string(column, unit="us")])
+            else:
+                values.append(column.tolist())
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    @staticmethod
+    def columns_to_jsonl(columns) -> bytes:
+        """Encode a columnar batch as JSONL bytes without building dicts
+
+        Each column is rendered to JSON text once (low-cardinality string
+        columns through a lookup table) and rows are stitched together with
+        a single format template.
+        """
+        names = list(columns)
+        rendered = []
+        for name in names:
+            column = columns[name]
+            if name == "timestamp":
+                rendered.append(['"' + ts + 'Z"' for ts in np.datetime_as_string(column, unit="us")])
+            elif column.dtype == object:
+                lookup = {value: json.dumps(value) for value in set(column.tolist())}
+                rendered.append([lookup[value] for value in column.tolist()])
+            else:
+                rendered.append(list(map(repr, column.tolist())))
+
+        template = "{" + ", ".join(f"{json.dumps(name)}: %s" for name in names) + "}\n"
+        return "".join([template % row for row in zip(*rendered)]).encode("utf-8")
+
+    def _batch_timestamps(self, n):
+        """n distinct timestamps from now on, later than every earlier batch's"""
+        start = max(np.datetime64(datetime.utcnow(), "us"), self._next_timestamp)
+        self._next_timestamp = start + np.timedelta64(n, "us")
+        return start + np.arange(n).astype("timedelta64[us]")
+
+    def _choice(self, options, n):
+        """Pick n values from options"""
+        return np.asarray(options, dtype=object)[self.rng.integers(0, len(options), n)]
+
+    def _uniform(self, low, high, n):
+        """n floats in [low, high) rounded to 2 decimals"""
+        return np.round(self.rng.uniform(low, high, n), 2)
+
+    def _randint(self, low, high, n):
+        """n ints in [low, high], inclusive like random.randint"""
+        return self.rng.integers(low, np.asarray(high) + 1, n)
+
+    def _server_columns(self, n, timestamps) -> dict:
+        """Columnar equivalent of generate_server_metric"""
+        return {
+            "timestamp": timestamps,
+            "server_id": self._choice(self.servers, n),
+            "region": self._choice(self.regions, n),
+            "environment": self._choice(self.environments, n),
+            "cpu_percent": self._uniform(5, 95, n),
+            "memory_percent": self._uniform(10, 90, n),
+            "memory_used_gb": self._uniform(2, 15, n),
+            "memory_total_gb": np.full(n, 16),
+            "disk_used_gb": self._randint(50, 450, n),
+            "disk_total_gb": np.full(n, 500),
+            "status": self._choice(["healthy", "warning", "critical"], n)
+        }
+
+    def _container_columns(self, n, timestamps) -> dict:
+        """Columnar equivalent of generate_container_metric"""
+        memory_limit_mb = self._choice([512, 1024, 2048], n).astype(np.int64)
+        memory_mb = self._randint(50, (memory_limit_mb * 0.9).astype(np.int64), n)
+
+        return {
+            "timestamp": timestamps,
+            "container_id": self._choice(self.containers, n),
+            "service_name": self._choice(self.services, n),
+            "version": self._choice(self.service_versions, n),
+            "environment": self._choice(self.environments, n),
+            "cpu_percent": self._uniform(5, 90, n),
+            "memory_mb": memory_mb,
+            "memory_limit_mb": memory_limit_mb,
+            "requests_per_sec": self._randint(10, 500, n),
+            "response_time_ms": self._uniform(50, 2000, n),
+            "error_count": self._randint(0, 20, n),
+            "restart_count": self._randint(0, 3, n),
+            "health": self._choice(["healthy", "degraded", "unhealthy"], n)
+        }
+
+    def _service_columns(self, n, timestamps) -> dict:
+        """Columnar equivalent of generate_service_metric"""
+        total_requests = self._randint(1000, 10000, n)
+        failed_requests = self._randint(0, (total_requests * 0.1).astype(np.int64), n)
+
+        return {
+            "timestamp": timestamps,
+            "service_name": self._choice(self.services, n),
+            "version": self._choice(self.service_versions, n),
+            "environment": self._choice(self.environments, n),
+            "region": self._choice(self.regions, n),
+            "total_requests": total_requests,
+            "failed_requests": failed_requests,
+            "error_rate_percent": self._uniform(0, 8, n),
+            "avg_response_time_ms": self._uniform(50, 800, n),
+            "p95_response_time_ms": self._uniform(200, 2000, n),
+            "instances_running": self._randint(2, 8, n),
+            "cpu_avg_percent": self._uniform(20, 85, n),
+            "memory_avg_percent": self._uniform(30, 80, n)
+        }
+
     def generate_and_publish(self):
         """Generate metrics and publish to GCP Pub/Sub"""
         server_metric = self.generate_server_metric()
@@ -102,6 +291,33 @@ class TelemetryGeneratorService:
             "service": service_metric
         }
     
+    def publish_batch(self, kind, n, entity_ids=None):
+        """Generate n metrics of one kind and publish them to its topic
+
+        With envelope_records > 1 the metrics are packed into envelopes of up
+        to envelope_records records / envelope_bytes bytes, one message each.
+        """
+        topic_id = BATCH_KINDS[kind]
+        metrics = self.generate_batch(kind, n, output="dicts", entity_ids=entity_ids)
+        
+        if self.envelope_records > 1:
+            envelopes = pack_records(
+                topic_id,
+                metrics,
+                encoding=self.pubsub.wire_format,
+                max_records=self.envelope_records,
+                max_bytes=self.envelope_bytes,
+                compression=self.compression
+            )
+            for data, attributes in envelopes:
+                self.pubsub.publish_encoded(topic_id, data, attributes)
+        else:
+            for metric in metrics:
+                self.pubsub.publish(topic_id, metric)
+
+        self.generated_count += n
+        return n
+    
     def get_stats(self) -> dict:
         """Get generation statistics"""
         return {
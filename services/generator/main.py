@@ -13,8 +13,11 @@ from flask import Flask, jsonify
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from shared import GCPPubSubBroker
+from shared import create_broker, broker_options_from_env
 from services.generator import TelemetryGeneratorService
+from services.generator.scheduler import LoadScheduler, parse_profile
+from services.generator.fleet import FleetEmitter
+from services.generator.sharding import ShardedGenerator
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,6 +25,9 @@ logger = logging.getLogger(__name__)
 # Global generator instance
 generator = None
 generator_thread = None
+scheduler = None
+fleet = None
+sharded = None
 
 
 def run_generator_loop():
@@ -47,6 +53,95 @@ def run_generator_loop():
         logger.error(f"Generator error: {e}")
 
 
+def run_load_loop():
+    """Background thread publishing at the configured load profile"""
+    try:
+        scheduler.run()
+    except Exception as e:
+        logger.error(f"Load scheduler error: {e}")
+
+
+def load_profile_specs():
+    """Read LOAD_PROFILE / LOAD_PROFILE_<TOPIC> variables"""
+    default_spec = os.getenv('LOAD_PROFILE', '1')
+    specs = {}
+    for topic_id in ('server_metrics', 'container_metrics', 'service_metrics'):
+        specs[topic_id] = os.getenv(f'LOAD_PROFILE_{topic_id.upper()}', default_spec)
+        logger.info(f"🚦 {topic_id}: {specs[topic_id]}")
+    return specs
+
+
+def build_scheduler():
+    """Create a LoadScheduler from the load profile variables"""
+    profiles = {
+        topic_id: parse_profile(spec)
+        for topic_id, spec in load_profile_specs().items()
+    }
+    
+    return LoadScheduler(
+        generator,
+        profiles,
+        catch_up_seconds=float(os.getenv('LOAD_CATCH_UP_SECONDS', 5))
+    )
+
+
+def run_fleet_loop():
+    """Background thread emitting per-entity metrics for the whole fleet"""
+    try:
+        fleet.run()
+    except Exception as e:
+        logger.error(f"Fleet emitter error: {e}")
+
+
+def fleet_config():
+    """Read FLEET_* variables"""
+    default_interval = float(os.getenv('FLEET_INTERVAL_SECONDS', 60))
+    return {
+        'servers': int(os.getenv('FLEET_SERVERS', 100_000)),
+        'containers': int(os.getenv('FLEET_CONTAINERS', 500_000)),
+        'intervals': {
+            kind: float(os.getenv(f'FLEET_{kind.upper()}_INTERVAL_SECONDS', default_interval))
+            for kind in ('server', 'container', 'service')
+        },
+        'jitter': float(os.getenv('FLEET_JITTER', 0.1))
+    }
+
+
+def build_fleet():
+    """Create a FleetEmitter from the fleet variables"""
+    config = fleet_config()
+    generator.configure_fleet(servers=config['servers'], containers=config['containers'])
+    
+    return FleetEmitter(generator, config['intervals'], jitter=config['jitter'])
+
+
+def envelope_options():
+    """Read ENVELOPE_* variables (records per message, byte budget, compression)"""
+    return {
+        'envelope_records': int(os.getenv('ENVELOPE_RECORDS', 1)),
+        'envelope_bytes': int(os.getenv('ENVELOPE_MAX_BYTES', 256_000)),
+        'compression': os.getenv('ENVELOPE_COMPRESSION') or None
+    }
+
+
+def build_sharded(mode, workers, broker_type, project_id):
+    """Create a ShardedGenerator running the given mode in worker processes"""
+    config = {
+        'mode': mode,
+        'broker_type': broker_type,
+        'project_id': project_id,
+        'broker_options': broker_options_from_env(broker_type),
+        'generator_options': envelope_options(),
+        'catch_up_seconds': float(os.getenv('LOAD_CATCH_UP_SECONDS', 5))
+    }
+    if mode == 'fleet':
+        config['fleet'] = fleet_config()
+    else:
+        config['profiles'] = load_profile_specs()
+    
+    return ShardedGenerator(workers, config)
+
+
 def create_app():
     """Create Flask app for Cloud Run"""
     app = Flask(__name__)
@@ -54,10 +149,21 @@ def create_app():
     @app.route('/health', methods=['GET'])
     def health():
         """Health check endpoint"""
+        if sharded:
+            return jsonify({
+                'status': 'healthy',
+                'service': 'generator',
+                'total_generated': sharded.get_stats()['total_generated'],
+                'workers': sharded.get_stats()
+            }), 200
+        
         return jsonify({
             'status': 'healthy',
             'service': 'generator',
-            'total_generated': generator.get_stats()['total_generated'] if generator else 0
+            'total_generated': generator.get_stats()['total_generated'] if generator else 0,
+            'publisher': generator.pubsub.get_stats() if generator else {},
+            'load': scheduler.get_stats() if scheduler else None,
+            'fleet': fleet.get_stats() if fleet else None
         }), 200
     
     @app.route('/', methods=['GET'])
@@ -74,9 +180,10 @@ def create_app():
 
 def main():
     """Run Generator Service independently"""
-    global generator, generator_thread
+    global generator, generator_thread, scheduler, fleet, sharded
     
     project_id = os.getenv('GCP_PROJECT_ID')
+    broker_type = os.getenv('BROKER_TYPE', 'gcp').lower()
     
     # Set service account credentials from config folder if not already set
     if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
@@ -85,25 +192,57 @@ def main():
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = cred_path
             logger.info(f"🔑 Using service account: {cred_path}")
     
-    if not project_id:
+    if broker_type == 'gcp' and not project_id:
         logger.error("❌ Missing GCP_PROJECT_ID environment variable")
         sys.exit(1)
+    if broker_type == 'memory':
+        # In-process queues cannot reach the other service's process: nothing would ever be delivered
+        logger.error("❌ BROKER_TYPE=memory only works within one process; use 'file' or 'gcp' for the services")
+        sys.exit(1)
     
     logger.info("=" * 70)
     logger.info("🚀 Generator Microservice Starting")
     logger.info(f"📡 GCP Project: {project_id}")
+    logger.info(f"📨 Broker: {broker_type}")
     logger.info("=" * 70)
     
-    # Initialize generator service
-    pubsub = GCPPubSubBroker(project_id)
-    generator = TelemetryGeneratorService(pubsub)
+    mode = os.getenv('GENERATOR_MODE', 'interval').lower()
+    workers = int(os.getenv('GENERATOR_WORKERS', 1))
+    
+    # GENERATOR_WORKERS > 1 shards load/fleet mode across processes, each with its own publisher
+    if workers > 1 and mode in ('load', 'fleet'):
+        sharded = build_sharded(mode, workers, broker_type, project_id)
+        sharded.start()
+        
+        app = create_app()
+        port = int(os.getenv('PORT', 8080))
+        logger.info(f"🌐 Starting HTTP server on port {port}")
+        app.run(host='0.0.0.0', port=port, debug=False)
+        return
+    
+    # Initialize generator service (PUBSUB_BATCHING=true trades per-message latency for throughput)
+    pubsub = create_broker(broker_type, project_id, **broker_options_from_env(broker_type))
+    generator = TelemetryGeneratorService(pubsub, **envelope_options())
     
     logger.info("✅ Generator service ready")
-    logger.info("📤 Publishing metrics every 5 minutes (conserving database space)")
+    
+    # GENERATOR_MODE=load publishes at a target rate, GENERATOR_MODE=fleet makes every
+    # simulated entity report on its own interval; default is one triple every 5 minutes
+    if mode == 'load':
+        scheduler = build_scheduler()
+        logger.info("📤 Publishing metrics at the configured load profile")
+        loop = run_load_loop
+    elif mode == 'fleet':
+        fleet = build_fleet()
+        logger.info("📤 Publishing one metric per fleet entity per interval")
+        loop = run_fleet_loop
+    else:
+        logger.info("📤 Publishing metrics every 5 minutes (conserving database space)")
+        loop = run_generator_loop
     logger.info("Press Ctrl+C to stop\n")
     
     # Start generator loop in background thread
-    generator_thread = threading.Thread(target=run_generator_loop, daemon=True)
+    generator_thread = threading.Thread(target=loop, daemon=True)
     generator_thread.start()
     
     # Start Flask app for Cloud Run
@@ -123,4 +262,8 @@ if __name__ == "__main__":
         if generator:
             stats = generator.get_stats()
             logger.info(f"📊 Total metrics generated: {stats['total_generated']}")
+            generator.pubsub.close(timeout=30)
+        if sharded:
+            sharded.stop()
+            logger.info(f"📊 Total metrics generated: {sharded.get_stats()['total_generated']}")
         logger.info("=" * 70)
@@ -0,0 +1,207 @@
+"""
+Load Profile Scheduler
+Token-bucket rate control for capacity testing the pipeline
+"""
+
+import collections
+import logging
+import threading
+import time
+
+from .generator_service import BATCH_KINDS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ConstantProfile:
+    """Fixed target rate"""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+
+    def rate_at(self, elapsed):
+        return self.rate
+
+
+class RampProfile:
+    """Linear ramp from start_rate to end_rate over duration seconds, then hold"""
+
+    def __init__(self, start_rate, end_rate, duration):
+        self.start_rate = float(start_rate)
+        self.end_rate = float(end_rate)
+        self.duration = float(duration)
+
+    def rate_at(self, elapsed):
+        if elapsed >= self.duration:
+            return self.end_rate
+        return self.start_rate + (self.end_rate - self.start_rate) * elapsed / self.duration
+
+
+class StepProfile:
+    """Sequence of (rate, duration) steps; the last rate is held afterwards"""
+
+    def __init__(self, steps):
+        self.steps = [(float(rate), float(duration)) for rate, duration in steps]
+
+    def rate_at(self, elapsed):
+        for rate, duration in self.steps:
+            if elapsed < duration:
+                return rate
+            elapsed -= duration
+        return self.steps[-1][0]
+
+
+class SpikeProfile:
+    """base_rate with a spike_rate burst of spike_duration every period seconds"""
+
+    def __init__(self, base_rate, spike_rate, period, spike_duration):
+        self.base_rate = float(base_rate)
+        self.spike_rate = float(spike_rate)
+        self.period = float(period)
+        self.spike_duration = float(spike_duration)
+
+    def rate_at(self, elapsed):
+        if elapsed % self.period < self.spike_duration:
+            return self.spike_rate
+        return self.base_rate
+
+
+class ScaledProfile:
+    """Another profile's rate multiplied by factor (e.g. split across shards)"""
+
+    def __init__(self, profile, factor):
+        self.profile = profile
+        self.factor = float(factor)
+
+    def rate_at(self, elapsed):
+        return self.profile.rate_at(elapsed) * self.factor
+
+
+def parse_profile(spec):
+    """Build a load profile from a compact string
+
+    constant:<rate>
+    ramp:<start_rate>:<end_rate>:<duration>
+    step:<rate>x<duration>,<rate>x<duration>,...
+    spike:<base_rate>:<spike_rate>:<period>:<spike_duration>
+    A bare number is a constant rate. Rates are messages/sec.
+    """
+    kind, _, args = spec.strip().partition(':')
+    if not args:
+        return ConstantProfile(kind)
+    if kind == 'constant':
+        return ConstantProfile(args)
+    if kind == 'ramp':
+        return RampProfile(*args.split(':'))
+    if kind == 'step':
+        return StepProfile(step.split('x') for step in args.split(','))
+    if kind == 'spike':
+        return SpikeProfile(*args.split(':'))
+    raise ValueError(f"Unknown load profile: {spec}")
+
+
+class TokenBucket:
+    """Token bucket whose refill rate can change on every refill
+
+    Tokens that cannot be spent immediately accumulate up to
+    rate * catch_up_seconds, so a producer that falls behind bursts to
+    catch up instead of silently dropping the deficit.
+    """
+
+    def __init__(self, catch_up_seconds=5.0):
+        self.catch_up_seconds = catch_up_seconds
+        self.tokens = 0.0
+        self.last_refill = None
+
+    def refill(self, rate, now):
+        if self.last_refill is not None:
+            capacity = max(rate * self.catch_up_seconds, 1.0)
+            self.tokens = min(capacity, self.tokens + (now - self.last_refill) * rate)
+        self.last_refill = now
+
+    def take(self, limit):
+        """Remove and return up to limit whole tokens"""
+        n = min(int(self.tokens), limit)
+        self.tokens -= n
+        return n
+
+
+class LoadScheduler:
+    """Publishes each topic at a target messages/sec following a load profile"""
+
+    def __init__(self, generator, profiles, tick_interval=0.01, max_batch=5000,
+                 catch_up_seconds=5.0, window_seconds=10.0):
+        self.generator = generator
+        # topic_id -> profile
+        self.profiles = dict(profiles)
+        self.tick_interval = tick_interval
+        self.max_batch = max_batch
+        self.window_seconds = window_seconds
+
+        self.kinds = {topic_id: kind for kind, topic_id in BATCH_KINDS.items()}
+        self.buckets = {topic_id: TokenBucket(catch_up_seconds) for topic_id in self.profiles}
+        self.sent = {topic_id: 0 for topic_id in self.profiles}
+        self.target = {topic_id: 0.0 for topic_id in self.profiles}
+        # Recent (monotonic time, sent total) samples for the achieved rate
+        self.samples = {topic_id: collections.deque() for topic_id in self.profiles}
+
+        self.started_at = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Run until stop() is called"""
+        self.started_at = time.monotonic()
+        logger.info(f"🚦 Load scheduler started: {', '.join(self.profiles)}")
+
+        while not self._stop.is_set():
+            tick_start = time.monotonic()
+            elapsed = tick_start - self.started_at
+
+            for topic_id, profile in self.profiles.items():
+                rate = max(profile.rate_at(elapsed), 0.0)
+                bucket = self.buckets[topic_id]
+                bucket.refill(rate, tick_start)
+
+                n = bucket.take(self.max_batch)
+                if n:
+                    self.generator.publish_batch(self.kinds[topic_id], n)
+
+                with self._lock:
+                    self.target[topic_id] = rate
+                    self.sent[topic_id] += n
+                    self._record_sample(topic_id, tick_start)
+
+            # Sleep out the rest of the tick; a late tick is absorbed by the buckets
+            remaining = self.tick_interval - (time.monotonic() - tick_start)
+            if remaining > 0:
+                self._stop.wait(remaining)
+
+    def _record_sample(self, topic_id, now):
+        samples = self.samples[topic_id]
+        samples.append((now, self.sent[topic_id]))
+        while samples and now - samples[0][0] > self.window_seconds:
+            samples.popleft()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self) -> dict:
+        """Target vs achieved rate per topic"""
+        stats = {}
+        with self._lock:
+            for topic_id in self.profiles:
+                samples = self.samples[topic_id]
+                achieved = 0.0
+                if len(samples) >= 2:
+                    (t0, c0), (t1, c1) = samples[0], samples[-1]
+                    if t1 > t0:
+                        achieved = (c1 - c0) / (t1 - t0)
+                stats[topic_id] = {
+                    "target_rate": round(self.target[topic_id], 2),
+                    "achieved_rate": round(achieved, 2),
+                    "sent": self.sent[topic_id],
+                    "backlog": int(self.buckets[topic_id].tokens)
+                }
+        return stats
@@ -0,0 +1,134 @@
+"""
+Sharded Generator
+Runs the generator in N worker processes to get past the GIL
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _shard(items, index, count):
+    """Every count-th item starting at index"""
+    return items[index::count]
+
+
+def _worker_main(index, count, config, counters, stop_event):
+    """Entry point of one generator worker process
+
+    Builds its own broker and generator, takes its slice of the fleet and
+    runs the configured loop until the parent sets stop_event. The
+    generated count is mirrored into counters[index] once per second.
+    """
+    from shared import create_broker
+    from services.generator import TelemetryGeneratorService
+    from services.generator.fleet import FleetEmitter
+    from services.generator.scheduler import LoadScheduler, ScaledProfile, parse_profile
+
+    pubsub = create_broker(config['broker_type'], config.get('project_id'), **config.get('broker_options', {}))
+    seed = config.get('seed')
+    generator = TelemetryGeneratorService(
+        pubsub,
+        seed=None if seed is None else seed + index,
+        **config.get('generator_options', {})
+    )
+
+    fleet = config.get('fleet') or {}
+    generator.configure_fleet(servers=fleet.get('servers'), containers=fleet.get('containers'))
+    generator.servers = _shard(generator.servers, index, count)
+    generator.containers = _shard(generator.containers, index, count)
+
+    if config['mode'] == 'fleet':
+        # Services are too few to shard; only the first worker reports them
+        intervals = dict(fleet['intervals'])
+        if index != 0:
+            intervals.pop('service', None)
+        runner = FleetEmitter(generator, intervals, jitter=fleet.get('jitter', 0.1))
+    else:
+        # Each worker carries an equal share of the target rate
+        profiles = {
+            topic_id: ScaledProfile(parse_profile(spec), 1 / count)
+            for topic_id, spec in config['profiles'].items()
+        }
+        runner = LoadScheduler(generator, profiles, catch_up_seconds=config.get('catch_up_seconds', 5.0))
+
+    thread = threading.Thread(target=runner.run, daemon=True)
+    thread.start()
+    logger.info(f"🧵 Generator worker {index + 1}/{count} started "
+                f"({len(generator.servers)} servers, {len(generator.containers)} containers)")
+
+    try:
+        while not stop_event.wait(1.0):
+            counters[index] = generator.generated_count
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+        thread.join(5)
+        counters[index] = generator.generated_count
+        pubsub.close(timeout=30)
+
+
+class ShardedGenerator:
+    """Parent-side handle for a pool of generator worker processes
+
+    config is a picklable dict:
+      mode: 'load' or 'fleet'
+      broker_type, project_id, broker_options: passed to create_broker
+      generator_options: extra TelemetryGeneratorService arguments (envelopes)
+      profiles: {topic_id: profile spec} for load mode (rates are totals)
+      fleet: {servers, containers, intervals, jitter} for fleet mode
+      seed: optional base seed, worker i uses seed + i
+    """
+
+    def __init__(self, workers, config):
+        if config.get('broker_type') == 'memory':
+            raise ValueError("The in-memory broker cannot be shared across processes")
+
+        self.workers = workers
+        self.config = config
+        # Spawn so workers never inherit gRPC state from the parent
+        self._context = multiprocessing.get_context('spawn')
+        self.counters = self._context.Array('q', workers)
+        self.stop_event = self._context.Event()
+        self.processes = []
+        self.started_at = None
+
+    def start(self):
+        """Start all worker processes"""
+        self.started_at = time.monotonic()
+        for index in range(self.workers):
+            process = self._context.Process(
+                target=_worker_main,
+                args=(index, self.workers, self.config, self.counters, self.stop_event),
+                name=f"generator-{index}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+        logger.info(f"🚀 Started {self.workers} generator workers ({self.config['mode']} mode)")
+
+    def stop(self, timeout=30):
+        """Ask workers to drain and exit"""
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+    def get_stats(self) -> dict:
+        """Merged generation statistics across workers"""
+        per_worker = list(self.counters)
+        total = sum(per_worker)
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0
+        return {
+            "total_generated": total,
+            "workers": self.workers,
+            "alive": sum(process.is_alive() for process in self.processes),
+            "per_worker": per_worker,
+            "rate": round(total / elapsed, 2) if elapsed > 0 else 0.0
+        }
@@ -0,0 +1,188 @@
+"""
+Micro-Batcher
+Bounded per-topic batching stage between broker callbacks and the segment writer
+"""
+
+import collections
+import logging
+import threading
+import time
+
+from .segment_writer import AckTracker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Decouples subscriber callbacks from storage
+
+    Callbacks submit a message with its decoded records and return at once.
+    One flusher thread per topic drains up to max_batch records (or whatever
+    arrived within max_delay seconds) and hands them to
+    handler(topic_id, batch, tracker); batch is a list of (message, records)
+    and every message in it is acked or nacked together through tracker.
+    on_settle(topic_id, batch, ok) runs once a batch is acked or nacked.
+
+    Records count against the watermarks from submit until their batch is
+    settled (durably stored or failed). Above high_watermark submit() blocks
+    the calling subscriber thread until the count drops below
+    low_watermark. Blocked callbacks keep their messages leased, so the
+    broker's own flow control stops delivering more.
+
+    With a metrics registry, the time from submit to ack/nack of each batch
+    (measured from its oldest message) is observed as the 'ack' stage.
+    """
+
+    def __init__(self, topics, handler, max_batch=500, max_delay=0.05,
+                 high_watermark=50_000, low_watermark=25_000, on_settle=None, metrics=None):
+        if low_watermark > high_watermark:
+            raise ValueError("low_watermark must not exceed high_watermark")
+
+        self.handler = handler
+        self.on_settle = on_settle
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self._ack_latency = None
+        if metrics is not None:
+            self._ack_latency = metrics.histogram(
+                'ingestion_stage_seconds', 'Ingestion latency per pipeline stage', ('topic', 'stage')
+            )
+
+        self._queues = {topic_id: collections.deque() for topic_id in topics}
+        self._queued = {topic_id: 0 for topic_id in topics}
+        self._ready = {topic_id: threading.Condition() for topic_id in topics}
+        self._open = threading.Event()
+        self._open.set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self.in_flight = 0
+        self.batches = 0
+        self.pauses = 0
+        self.paused_seconds = 0.0
+        self._paused_at = None
+
+        self._threads = []
+        for topic_id in topics:
+            thread = threading.Thread(target=self._flush_loop, args=(topic_id,),
+                                      name=f"batcher-{topic_id}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"🧺 Micro-batcher ready: {max_batch} records / {max_delay * 1000:.0f} ms per batch, "
+                    f"watermarks {low_watermark}/{high_watermark}")
+
+    def submit(self, topic_id, message, records):
+        """Queue a message's records; blocks while the buffer is above the high watermark"""
+        while not self._open.wait(0.5):
+            if self._stop.is_set():
+                break
+
+        count = len(records)
+        with self._lock:
+            self.in_flight += count
+            if self.in_flight >= self.high_watermark and self._open.is_set():
+                self._open.clear()
+                self.pauses += 1
+                self._paused_at = time.monotonic()
+                logger.warning(f"⏸️  Ingestion paused: {self.in_flight} records buffered")
+
+        condition = self._ready[topic_id]
+        with condition:
+            self._queues[topic_id].append((message, records, time.monotonic()))
+            self._queued[topic_id] += count
+            if self._queued[topic_id] >= self.max_batch:
+                condition.notify()
+
+    def _settled(self, topic_id, batch, count, ok, submitted_at):
+        if self._ack_latency is not None:
+            self._ack_latency.observe(time.monotonic() - submitted_at, topic_id, 'ack')
+        if self.on_settle:
+            try:
+                self.on_settle(topic_id, batch, ok)
+            except Exception as e:
+                logger.error(f"❌ {topic_id} settle hook failed: {e}")
+        self._release(count)
+
+    def _release(self, count):
+        with self._lock:
+            self.in_flight -= count
+            if not self._open.is_set() and self.in_flight <= self.low_watermark:
+                self.paused_seconds += time.monotonic() - self._paused_at
+                self._open.set()
+                logger.info(f"▶️  Ingestion resumed: {self.in_flight} records buffered")
+
+    def _take(self, topic_id):
+        """Wait for a full batch or max_delay; returns the batch (possibly empty)"""
+        condition = self._ready[topic_id]
+        queue = self._queues[topic_id]
+        with condition:
+            deadline = time.monotonic() + self.max_delay
+            while self._queued[topic_id] < self.max_batch and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                condition.wait(remaining)
+
+            batch = []
+            size = 0
+            submitted_at = None
+            while queue and (size < self.max_batch or not batch):
+                message, records, queued_at = queue.popleft()
+                batch.append((message, records))
+                size += len(records)
+                if submitted_at is None:
+                    submitted_at = queued_at
+            self._queued[topic_id] -= size
+        return batch, size, submitted_at
+
+    def _flush_loop(self, topic_id):
+        while True:
+            batch, size, submitted_at = self._take(topic_id)
+            if not batch:
+                if self._stop.is_set():
+                    break
+                continue
+
+            tracker = AckTracker(
+                *(message for message, _ in batch),
+                on_settle=lambda ok, batch=batch, size=size, submitted_at=submitted_at:
+                    self._settled(topic_id, batch, size, ok, submitted_at)
+            )
+            tracker.hold()
+            try:
+                self.handler(topic_id, batch, tracker)
+                ok = True
+            except Exception as e:
+                logger.error(f"❌ {topic_id} batch of {size} records failed: {e}")
+                ok = False
+            tracker.release(ok)
+            tracker.seal()
+            with self._lock:
+                self.batches += 1
+
+    def close(self, timeout=10):
+        """Hand every queued record to the handler and stop the flushers"""
+        self._stop.set()
+        for condition in self._ready.values():
+            with condition:
+                condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            paused_seconds = self.paused_seconds
+            if self._paused_at is not None and not self._open.is_set():
+                paused_seconds += time.monotonic() - self._paused_at
+            return {
+                "in_flight": self.in_flight,
+                "queued": dict(self._queued),
+                "batches": self.batches,
+                "paused": not self._open.is_set(),
+                "pauses": self.pauses,
+                "paused_seconds": round(paused_seconds, 2)
+            }
@@ -0,0 +1,190 @@
+"""
+Dead-Letter Sink
+Bounded, rotating storage for rejected records and parked poison messages
+"""
+
+import base64
+import collections
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from shared.segments import segment_path
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_PREFIX = "dead-letter"
+
+
+def reason_key(reason):
+    """Low-cardinality counter key of a reason ('cpu_percent: 120 above 100' -> 'invalid:cpu_percent')"""
+    if ': ' in reason:
+        return f"invalid:{reason.split(': ', 1)[0]}"
+    return reason
+
+
+class DeliveryAttempts:
+    """Delivery attempt of a message
+
+    Uses the broker's delivery_attempt when it reports one; Pub/Sub only
+    does so for subscriptions with a dead-letter policy, so otherwise the
+    attempts of recently seen message IDs are counted locally (bounded LRU).
+    """
+
+    def __init__(self, capacity=100_000):
+        self.capacity = capacity
+        self._seen = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, message) -> int:
+        attempt = getattr(message, "delivery_attempt", None)
+        if attempt:
+            return attempt
+        message_id = getattr(message, "message_id", None)
+        if message_id is None:
+            return 1
+        with self._lock:
+            attempt = self._seen.pop(message_id, 0) + 1
+            self._seen[message_id] = attempt
+            if len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+        return attempt
+
+
+class DeadLetterSink:
+    """Writes dead letters as JSONL segments under dead-letter/
+
+    Each line carries the topic, reason, message ID and either the rejected
+    record or the raw payload of a parked message. Segments roll at
+    max_bytes or max_age seconds and only the newest max_segments are
+    kept, so a misbehaving producer cannot fill the store. Rejected records
+    are buffered; parked messages are written before they are acked.
+    """
+
+    def __init__(self, store, instance_id, max_bytes=1_000_000, max_age=30.0, max_segments=100):
+        self.store = store
+        self.instance_id = instance_id
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_segments = max_segments
+
+        self._lines = []
+        self._size = 0
+        self._opened_at = time.monotonic()
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self.counts = collections.Counter()
+        self.dropped_count = 0
+        self.segments_written = 0
+
+        # Oldest first, so rotation also covers segments of earlier runs
+        try:
+            existing = sorted(self.store.list(f"{DEAD_LETTER_PREFIX}/"),
+                              key=lambda info: (info.updated.timestamp() if info.updated else 0, info.name))
+            self._segments = collections.deque(info.name for info in existing)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not list dead-letter segments: {e}")
+            self._segments = collections.deque()
+
+        self._thread = threading.Thread(target=self._age_loop, name="dead-letter-age", daemon=True)
+        self._thread.start()
+
+    def _entry(self, topic_id, reason, message_id, **fields):
+        entry = {
+            "topic": topic_id,
+            "reason": reason,
+            "message_id": message_id,
+            "dead_lettered_at": datetime.utcnow().isoformat() + "Z"
+        }
+        entry.update(fields)
+        return json.dumps(entry, default=str) + "\n"
+
+    def _append(self, line, reason):
+        with self._lock:
+            self.counts[reason_key(reason)] += 1
+            self._lines.append(line)
+            self._size += len(line)
+            # Bound memory if storage is failing: keep the newest lines only
+            while self._size > self.max_bytes * 4 and len(self._lines) > 1:
+                self._size -= len(self._lines.pop(0))
+                self.dropped_count += 1
+            return self._size >= self.max_bytes
+
+    def reject(self, topic_id, record, reason, message_id=None):
+        """Dead-letter one record that failed validation"""
+        if self._append(self._entry(topic_id, reason, message_id, record=record), reason):
+            self.flush()
+
+    def park(self, topic_id, message, reason, attempt=None) -> bool:
+        """Dead-letter a whole message; returns True once it is stored and may be acked"""
+        data = message.data
+        try:
+            payload = {"payload": data.decode("utf-8")}
+        except UnicodeDecodeError:
+            payload = {"payload_base64": base64.b64encode(data).decode("ascii")}
+        line = self._entry(
+            topic_id, reason, getattr(message, "message_id", None),
+            attributes=dict(message.attributes or {}), delivery_attempt=attempt, **payload
+        )
+        self._append(line, reason)
+        return self.flush()
+
+    def flush(self) -> bool:
+        """Write buffered dead letters as a new segment; returns False if the write failed"""
+        with self._write_lock:
+            with self._lock:
+                if not self._lines:
+                    return True
+                lines, size = self._lines, self._size
+                self._lines, self._size = [], 0
+                self._opened_at = time.monotonic()
+                self._sequence += 1
+                sequence = self._sequence
+
+            name = segment_path(DEAD_LETTER_PREFIX, datetime.utcnow().strftime("dt=%Y-%m-%d"),
+                                self.instance_id, sequence)
+            try:
+                self.store.append_segment(name, "".join(lines).encode("utf-8"),
+                                          content_type="application/x-ndjson")
+            except Exception as e:
+                logger.error(f"❌ Failed to write dead-letter segment {name}: {e}")
+                with self._lock:
+                    self._lines[:0] = lines
+                    self._size += size
+                return False
+
+            self._segments.append(name)
+            self.segments_written += 1
+            while len(self._segments) > self.max_segments:
+                oldest = self._segments.popleft()
+                try:
+                    self.store.delete(oldest)
+                except Exception as e:
+                    logger.warning(f"⚠️  Could not rotate out {oldest}: {e}")
+            return True
+
+    def _age_loop(self):
+        while not self._stop.wait(min(self.max_age / 4, 1.0)):
+            if self._lines and time.monotonic() - self._opened_at >= self.max_age:
+                self.flush()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(5)
+        self.flush()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "by_reason": dict(self.counts),
+                "buffered": len(self._lines),
+                "dropped": self.dropped_count,
+                "segments_written": self.segments_written,
+                "segments_retained": len(self._segments)
+            }
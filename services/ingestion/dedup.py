@@ -0,0 +1,160 @@
+"""
+Redelivery De-duplication
+Memory-bounded seen-set of acked messages: time-windowed LRU backed by Bloom filters
+"""
+
+import collections
+import hashlib
+import logging
+import math
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEDUP_KEYS = ('message_id', 'content')
+
+# Approximate memory held per LRU entry (OrderedDict node, key string, float)
+LRU_ENTRY_BYTES = 200
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte keys"""
+
+    def __init__(self, size_bytes, hashes):
+        self.size_bits = size_bytes * 8
+        self.hashes = hashes
+        self.bits = bytearray(size_bytes)
+
+    @classmethod
+    def for_capacity(cls, capacity, size_bytes):
+        """Filter of size_bytes with the hash count that minimizes false positives at capacity"""
+        hashes = max(1, round(size_bytes * 8 / max(capacity, 1) * math.log(2)))
+        return cls(size_bytes, min(hashes, 16))
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class Deduplicator:
+    """Drops redeliveries of messages that were already stored
+
+    Keys are '<topic>:<message_id>' or, with key='content', a hash of the
+    topic and payload (which also catches producers republishing the same
+    record). Only messages whose batch was acked are remembered, so a
+    redelivery after a failed write is never dropped.
+
+    An exact LRU remembers keys for window_seconds. When the memory ceiling
+    forces it to evict keys younger than the window, two rotating Bloom
+    filters (each covering one window) answer for the evicted tail; a Bloom
+    hit counts as a duplicate only then, so false positives cannot drop
+    data while the LRU still covers the whole window.
+    """
+
+    def __init__(self, key='message_id', window_seconds=600, max_memory_bytes=64_000_000):
+        if key not in DEDUP_KEYS:
+            raise ValueError(f"Unknown dedup key: {key}")
+        self.key = key
+        self.window_seconds = window_seconds
+        self.max_memory_bytes = max_memory_bytes
+
+        # Half the budget for the LRU, a quarter for each Bloom generation
+        self.lru_capacity = max(1, max_memory_bytes // 2 // LRU_ENTRY_BYTES)
+        self._bloom_bytes = max(1, max_memory_bytes // 4)
+        self._bloom_capacity = self.lru_capacity * 4
+        self._blooms = [self._new_bloom(), self._new_bloom()]
+        self._rotated_at = time.monotonic()
+
+        self._seen = collections.OrderedDict()
+        # Newest seen time of any key evicted for memory, not age
+        self._evicted_at = None
+        self._lock = threading.Lock()
+
+        self.checks = 0
+        self.lru_hits = 0
+        self.bloom_hits = 0
+
+        logger.info(f"🧹 Dedup on {key}: {window_seconds}s window, {max_memory_bytes / 1e6:.0f} MB ceiling "
+                    f"({self.lru_capacity} exact keys)")
+
+    def _new_bloom(self):
+        return BloomFilter.for_capacity(self._bloom_capacity, self._bloom_bytes)
+
+    def key_for(self, topic_id, message) -> str:
+        """Dedup key of a delivered message"""
+        message_id = getattr(message, 'message_id', None)
+        if self.key == 'message_id' and message_id is not None:
+            return f"{topic_id}:{message_id}"
+        digest = hashlib.blake2b(message.data, digest_size=16)
+        for name, value in sorted((message.attributes or {}).items()):
+            digest.update(f"\0{name}={value}".encode('utf-8'))
+        return f"{topic_id}#{digest.hexdigest()}"
+
+    def _expire(self, now):
+        """Drop LRU entries older than the window and rotate Bloom generations"""
+        cutoff = now - self.window_seconds
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if seen_at >= cutoff:
+                break
+            self._seen.popitem(last=False)
+        if self._evicted_at is not None and self._evicted_at < cutoff:
+            self._evicted_at = None
+        if now - self._rotated_at >= self.window_seconds:
+            self._blooms = [self._new_bloom(), self._blooms[0]]
+            self._rotated_at = now
+
+    def is_duplicate(self, key) -> bool:
+        """Whether a key was already stored within the window"""
+        now = time.monotonic()
+        encoded = key.encode('utf-8')
+        with self._lock:
+            self.checks += 1
+            self._expire(now)
+            if key in self._seen:
+                self.lru_hits += 1
+                return True
+            # Only trust the Bloom filters for keys the LRU may have evicted
+            if self._evicted_at is not None and any(encoded in bloom for bloom in self._blooms):
+                self.bloom_hits += 1
+                return True
+            return False
+
+    def remember(self, keys):
+        """Record keys of messages that were durably stored and acked"""
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                self._seen[key] = now
+                self._seen.move_to_end(key)
+                self._blooms[0].add(key.encode('utf-8'))
+            while len(self._seen) > self.lru_capacity:
+                _, seen_at = self._seen.popitem(last=False)
+                self._evicted_at = seen_at if self._evicted_at is None else max(self._evicted_at, seen_at)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            duplicates = self.lru_hits + self.bloom_hits
+            return {
+                "key": self.key,
+                "checks": self.checks,
+                "duplicates": duplicates,
+                "hit_rate": round(duplicates / self.checks, 4) if self.checks else 0.0,
+                "lru_hits": self.lru_hits,
+                "bloom_hits": self.bloom_hits,
+                "lru_entries": len(self._seen),
+                "lru_capacity": self.lru_capacity,
+                "bloom_active": self._evicted_at is not None,
+                "memory_bytes": len(self._seen) * LRU_ENTRY_BYTES + 2 * self._bloom_bytes
+            }
@@ -1,167 +1,253 @@
 """
 Data Ingestion Microservice
-Consumes messages from GCP Pub/Sub, validates schema, stores to Cloud Storage
+Consumes messages from the message broker (GCP Pub/Sub by default), validates schema, stores to object storage
 """
 
-from google.cloud import storage
-from google.cloud import pubsub_v1
-from google.api_core import exceptions as gexc
-import json
 import logging
+import time
 from datetime import datetime
 
+from shared.envelope import decode_records
+from shared.metrics import REGISTRY
+from shared.validation import VALIDATORS
+from .batcher import MicroBatcher
+from .dead_letter import DeadLetterSink, DeliveryAttempts
+from .dedup import Deduplicator
+from .segment_writer import SegmentWriter
+from .wal import WriteAheadLog
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class DataIngestionService:
-    """Ingestion microservice - validates and stores to GCP Cloud Storage"""
+    """Ingestion microservice - validates and stores to object storage (GCS or local disk)"""
     
-    def __init__(self, pubsub, project_id, bucket_name):
+    def __init__(self, pubsub, store, segment_max_bytes=4_000_000, segment_max_age=10.0, segment_format='jsonl',
+                 segment_compression=None, segment_max_messages=None, batch_size=500, batch_delay=0.05,
+                 high_watermark=50_000, low_watermark=25_000, max_outstanding=None, max_delivery_attempts=5,
+                 dead_letter_max_segments=100, dedup_key='message_id', dedup_window=600,
+                 dedup_max_memory=64_000_000, wal_dir=None, wal_segment_bytes=64_000_000,
+                 wal_max_bytes=512_000_000, wal_commit_delay=0.0, metrics=REGISTRY):
         self.pubsub = pubsub
-        self.project_id = project_id
-        self.bucket_name = bucket_name
-        self.ingested_count = 0
-        self.subscriber = pubsub_v1.SubscriberClient()
+        self.store = store
         self.streaming_futures = []
         
-        # Initialize Cloud Storage
-        self.storage_client = storage.Client(project=project_id)
-        self.bucket = self.storage_client.bucket(bucket_name)
-        self._ensure_bucket_exists()
+        # Counters are sharded per thread: callbacks and flushers never contend on them
+        self.metrics = metrics
+        self.records_total = metrics.counter(
+            'ingestion_records_total', 'Records by outcome (stored once durable, rejected)', ('topic', 'outcome')
+        )
+        # id(batch) -> valid records of a batch being written, counted as stored once it is acked
+        self._batch_records = {}
+        self.messages_total = metrics.counter(
+            'ingestion_messages_total', 'Messages by outcome (received, envelope, duplicate, parked)',
+            ('topic', 'outcome')
+        )
+        self.stage_seconds = metrics.histogram(
+            'ingestion_stage_seconds', 'Ingestion latency per pipeline stage', ('topic', 'stage')
+        )
         
-        logger.info(f"✅ Connected to GCS Bucket: {bucket_name}")
+        # Unacked messages per subscription: sized from the high watermark so the batcher's pause (not
+        # the broker's default of 1000) is what bounds the pipeline
+        self.max_outstanding = max_outstanding or high_watermark
         
-        # Subscribe to GCP Pub/Sub topics
-        self._subscribe_and_consume()
-    
-    def _ensure_bucket_exists(self):
-        """Use existing bucket; require it to be pre-created."""
-        try:
-            self.bucket = self.storage_client.get_bucket(self.bucket_name)
-            logger.info(f"📦 Bucket exists: {self.bucket_name}")
-        except gexc.NotFound:
-            logger.error(
-                f"❌ Bucket '{self.bucket_name}' not found. Create it first or grant bucket create permissions."
-            )
-            raise
-        except gexc.Forbidden:
-            logger.error(
-                f"❌ No permission to access bucket '{self.bucket_name}'. Grant storage access to the service account."
+        # Records are acked only after the segment holding them is stored; segments are sealed before
+        # their unacked messages reach the subscriber's outstanding limit
+        if segment_max_messages is None:
+            segment_max_messages = self.max_outstanding * 4 // 5
+        self.writer = SegmentWriter(
+            store, max_bytes=segment_max_bytes, max_age=segment_max_age, max_messages=segment_max_messages,
+            output_format=segment_format, compression=segment_compression, metrics=metrics
+        )
+        
+        # With a write-ahead log, messages are acked after a local fsync; uploads happen behind it
+        self.wal = None
+        if wal_dir:
+            self.wal = WriteAheadLog(
+                wal_dir, self._store_records, segment_bytes=wal_segment_bytes,
+                max_live_bytes=wal_max_bytes, commit_delay=wal_commit_delay, metrics=metrics
             )
-            raise
+            self.wal.replay()
+        
+        # Rejected records and messages that keep failing end up here instead of being redelivered
+        self.max_delivery_attempts = max_delivery_attempts
+        self.attempts = DeliveryAttempts()
+        self.dead_letters = DeadLetterSink(store, self.writer.instance_id, max_segments=dead_letter_max_segments)
+        
+        # Redeliveries of already stored messages are acked and dropped (dedup_key=None disables)
+        self.dedup = None
+        if dedup_key:
+            self.dedup = Deduplicator(dedup_key, window_seconds=dedup_window, max_memory_bytes=dedup_max_memory)
+        
+        # Callbacks only decode and enqueue; per-topic flushers validate and write
+        self.labels = {
+            'server_metrics': "Server",
+            'container_metrics': "Container",
+            'service_metrics': "Service",
+        }
+        self.batcher = MicroBatcher(
+            self.labels, self._write_batch, max_batch=batch_size, max_delay=batch_delay,
+            high_watermark=high_watermark, low_watermark=low_watermark, on_settle=self._batch_settled,
+            metrics=metrics
+        )
+        self._register_gauges()
+        
+        # Subscribe to broker topics
+        self._subscribe_and_consume()
     
     def _subscribe_and_consume(self):
-        """Ensure subscriptions exist and start streaming consumers."""
-        subscription_configs = {
-            'server-metrics-sub': (
-                f'projects/{self.project_id}/topics/server-metrics',
-                self._server_callback,
-            ),
-            'container-metrics-sub': (
-                f'projects/{self.project_id}/topics/container-metrics',
-                self._container_callback,
-            ),
-            'service-metrics-sub': (
-                f'projects/{self.project_id}/topics/service-metrics',
-                self._service_callback,
-            ),
+        """Start streaming consumers on the configured broker."""
+        subscription_callbacks = {
+            'server_metrics': self._server_callback,
+            'container_metrics': self._container_callback,
+            'service_metrics': self._service_callback,
         }
 
-        for sub_name, (topic_path, callback) in subscription_configs.items():
-            sub_path = f'projects/{self.project_id}/subscriptions/{sub_name}'
-            try:
-                self.subscriber.create_subscription(request={'name': sub_path, 'topic': topic_path})
-                logger.info(f"📬 Created subscription: {sub_name}")
-            except gexc.AlreadyExists:
-                logger.info(f"📬 Subscription exists: {sub_name}")
-
-            future = self.subscriber.subscribe(sub_path, callback=callback)
+        for topic_id, callback in subscription_callbacks.items():
+            future = self.pubsub.subscribe(topic_id, callback, max_outstanding=self.max_outstanding)
             self.streaming_futures.append(future)
-            logger.info(f"▶️  Streaming consumer started: {sub_name}")
 
     def _server_callback(self, message):
-        try:
-            data = json.loads(message.data.decode("utf-8"))
-            self.ingest_server_metric(data)
-            message.ack()
-        except Exception as exc:
-            logger.error(f"❌ Server metric ingest failed: {exc}")
-            message.nack()
+        self._consume(message, 'server_metrics', "Server")
 
     def _container_callback(self, message):
-        try:
-            data = json.loads(message.data.decode("utf-8"))
-            self.ingest_container_metric(data)
-            message.ack()
-        except Exception as exc:
-            logger.error(f"❌ Container metric ingest failed: {exc}")
-            message.nack()
+        self._consume(message, 'container_metrics', "Container")
 
     def _service_callback(self, message):
-        try:
-            data = json.loads(message.data.decode("utf-8"))
-            self.ingest_service_metric(data)
+        self._consume(message, 'service_metrics', "Service")
+
+    def _consume(self, message, topic_id, label):
+        """Decode a message (one record, or many if it is an envelope) and queue it for batching"""
+        self.messages_total.inc(topic_id, 'received')
+        if self.dedup and self.dedup.is_duplicate(self.dedup.key_for(topic_id, message)):
+            self.messages_total.inc(topic_id, 'duplicate')
             message.ack()
-        except Exception as exc:
-            logger.error(f"❌ Service metric ingest failed: {exc}")
-            message.nack()
-    
-    def validate_schema(self, data: dict, required_fields: list) -> bool:
-        """Validate data has required fields"""
-        return all(field in data for field in required_fields)
-    
-    def ingest_server_metric(self, metric: dict):
-        """Ingest server metric"""
-        required = ["timestamp", "server_id", "cpu_percent", "memory_percent", "status"]
-        if not self.validate_schema(metric, required):
-            logger.error(f"❌ Invalid server metric schema: {metric}")
             return
         
-        self._store_to_gcs("server_metrics.jsonl", metric)
-        self.ingested_count += 1
-    
-    def ingest_container_metric(self, metric: dict):
-        """Ingest container metric"""
-        required = ["timestamp", "container_id", "cpu_percent", "memory_mb", "health"]
-        if not self.validate_schema(metric, required):
-            logger.error(f"❌ Invalid container metric schema: {metric}")
+        attempt = self.attempts.observe(message)
+        if attempt > self.max_delivery_attempts:
+            logger.warning(f"⚠️  Parking {label.lower()} message {message.message_id} after {attempt - 1} failed deliveries")
+            self._park(topic_id, message, "max_attempts", attempt)
             return
         
-        self._store_to_gcs("container_metrics.jsonl", metric)
-        self.ingested_count += 1
-    
-    def ingest_service_metric(self, metric: dict):
-        """Ingest service metric"""
-        required = ["timestamp", "service_name", "error_rate_percent", "p95_response_time_ms"]
-        if not self.validate_schema(metric, required):
-            logger.error(f"❌ Invalid service metric schema: {metric}")
+        started = time.perf_counter()
+        try:
+            records = decode_records(message)
+            self.stage_seconds.observe(time.perf_counter() - started, topic_id, 'decode')
+        except Exception as exc:
+            # Decoding is deterministic: redelivering would fail the same way
+            logger.error(f"❌ {label} metric ingest failed: {exc}")
+            self._park(topic_id, message, "decode_error", attempt)
             return
         
-        self._store_to_gcs("service_metrics.jsonl", metric)
-        self.ingested_count += 1
+        if len(records) > 1:
+            self.messages_total.inc(topic_id, 'envelope')
+        self.batcher.submit(topic_id, message, records)
     
-    def _store_to_gcs(self, filename: str, data: dict):
-        """Store data to GCS as JSONL (append by rewrite)."""
-        try:
-            blob = self.bucket.blob(filename)
-
-            # Read existing content if present
-            try:
-                existing_content = blob.download_as_string().decode("utf-8")
-            except Exception:
-                existing_content = ""
-
-            new_line = json.dumps(data) + "\n"
-            updated_content = existing_content + new_line
-
-            blob.upload_from_string(updated_content)
-        except Exception as e:
-            logger.error(f"❌ Failed to store metric: {e}")
+    def _batch_settled(self, topic_id, batch, ok):
+        """Count a durable batch's records as stored; remember its messages so redeliveries are dropped"""
+        stored = self._batch_records.pop(id(batch), 0)
+        if ok:
+            self.records_total.inc(topic_id, 'stored', amount=stored)
+        if ok and self.dedup:
+            self.dedup.remember([self.dedup.key_for(topic_id, message) for message, _ in batch])
+    
+    def _park(self, topic_id, message, reason, attempt):
+        """Move a message to the dead-letter sink; ack it only once that is stored"""
+        if self.dead_letters.park(topic_id, message, reason, attempt):
+            self.messages_total.inc(topic_id, 'parked')
+            message.ack()
+        else:
+            message.nack()
+    
+    def _write_batch(self, topic_id, batch, tracker):
+        """Validate and buffer a batch; its messages are acked once their segments are durable"""
+        label = self.labels[topic_id]
+        records = [record for _, message_records in batch for record in message_records]
+        started = time.perf_counter()
+        errors = VALIDATORS[topic_id].validate_batch(records)
+        self.stage_seconds.observe(time.perf_counter() - started, topic_id, 'validate')
+        
+        row = 0
+        rejected = 0
+        valid = []
+        for message, message_records in batch:
+            for record in message_records:
+                error = errors[row]
+                row += 1
+                if error is None:
+                    valid.append(record)
+                else:
+                    rejected += 1
+                    self.dead_letters.reject(topic_id, record, error, message.message_id)
+        
+        self._batch_records[id(batch)] = len(valid)
+        if self.wal and valid:
+            self.wal.append(topic_id, valid, tracker)
+        else:
+            for record in valid:
+                self.writer.add(topic_id, record, tracker)
+        
+        if rejected:
+            first = next(error for error in errors if error is not None)
+            logger.warning(f"⚠️  {label}: {rejected}/{len(records)} records dead-lettered (first: {first})")
+        self.records_total.inc(topic_id, 'rejected', amount=rejected)
+    
+    def _store_records(self, topic_id, records, pin):
+        """Write-ahead log sink: buffer logged records; pin is released once they are uploaded"""
+        for record in records:
+            self.writer.add(topic_id, record, pin)
+        pin.seal()
+    
+    def _register_gauges(self):
+        """Expose buffer state alongside the counters on /metrics"""
+        self.metrics.gauge('ingestion_in_flight_records', 'Records buffered and not yet durable',
+                           lambda: self.batcher.in_flight)
+        self.metrics.gauge('ingestion_paused', 'Whether consuming is paused by the high watermark',
+                           lambda: int(self.batcher.get_stats()['paused']))
+        self.metrics.gauge('ingestion_open_segment_buffers', 'Segments being filled',
+                           lambda: self.writer.get_stats()['open_buffers'])
+        self.metrics.gauge('ingestion_dead_letters', 'Dead-lettered records and messages by reason',
+                           lambda: self.dead_letters.get_stats()['by_reason'], ('reason',))
+        if self.dedup:
+            self.metrics.gauge('ingestion_dedup_hit_rate', 'Share of checked messages dropped as redeliveries',
+                               lambda: self.dedup.get_stats()['hit_rate'])
+    
+    def _message_total(self, outcome):
+        return sum(value for (_, key), value in self.messages_total.values().items() if key == outcome)
+    
+    @property
+    def ingested_count(self):
+        return sum(value for (_, outcome), value in self.records_total.values().items() if outcome == 'stored')
+    
+    @property
+    def rejected_count(self):
+        return sum(value for (_, outcome), value in self.records_total.values().items() if outcome == 'rejected')
     
     def get_stats(self) -> dict:
         """Get ingestion statistics"""
         return {
             "total_ingested": self.ingested_count,
+            "total_rejected": self.rejected_count,
+            "envelopes": self._message_total('envelope'),
+            "duplicates_dropped": self._message_total('duplicate'),
+            "dedup": self.dedup.get_stats() if self.dedup else None,
+            "batching": self.batcher.get_stats(),
+            "storage": self.writer.get_stats(),
+            "dead_letters": self.dead_letters.get_stats(),
+            "store": self.store.get_stats(),
+            "wal": self.wal.get_stats() if self.wal else None,
             "timestamp": datetime.utcnow().isoformat()
         }
+    
+    def close(self):
+        """Stop consuming and flush buffered segments"""
+        for future in self.streaming_futures:
+            future.cancel()
+        self.batcher.close()
+        if self.wal:
+            self.wal.close()
+        self.writer.close()
+        self.dead_letters.close()
+        self.store.close()
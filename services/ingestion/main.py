@@ -8,12 +8,13 @@ import sys
 import time
 import logging
 import threading
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from shared import GCPPubSubBroker
+from shared import create_broker, broker_options_from_env, create_store, store_options_from_env
+from shared.metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE
 from services.ingestion import DataIngestionService
 
 logging.basicConfig(level=logging.INFO)
@@ -47,16 +48,22 @@ def create_app():
         return jsonify({
             'status': 'healthy',
             'service': 'ingestion',
-            'total_ingested': ingestion.get_stats()['total_ingested'] if ingestion else 0
+            'total_ingested': ingestion.get_stats()['total_ingested'] if ingestion else 0,
+            'storage': ingestion.writer.get_stats() if ingestion else None
         }), 200
     
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus scrape endpoint"""
+        return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+    
     @app.route('/', methods=['GET'])
     def index():
         """Root endpoint"""
         return jsonify({
             'service': 'Industrial Cloud Ingestion',
             'status': 'running',
-            'description': 'Consumes telemetry data from Pub/Sub and stores to Cloud Storage'
+            'description': 'Consumes telemetry data from Pub/Sub and stores to object storage'
         }), 200
     
     return app
@@ -68,6 +75,9 @@ def main():
     
     project_id = os.getenv('GCP_PROJECT_ID')
     bucket_name = os.getenv('GCP_BUCKET_NAME')
+    broker_type = os.getenv('BROKER_TYPE', 'gcp').lower()
+    storage_type = os.getenv('STORAGE_TYPE', 'gcs').lower()
+    dedup_key = os.getenv('DEDUP_KEY', 'message_id').lower()
     
     # Set service account credentials from config folder if not already set
     if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
@@ -76,22 +86,53 @@ def main():
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = cred_path
             logger.info(f"🔑 Using service account: {cred_path}")
     
-    if not project_id or not bucket_name:
-        logger.error("❌ Missing GCP_PROJECT_ID or GCP_BUCKET_NAME environment variable")
+    if (broker_type == 'gcp' or storage_type == 'gcs') and not project_id:
+        logger.error("❌ Missing GCP_PROJECT_ID environment variable")
+        sys.exit(1)
+    if storage_type == 'gcs' and not bucket_name:
+        logger.error("❌ Missing GCP_BUCKET_NAME environment variable")
+        sys.exit(1)
+    if broker_type == 'memory':
+        # In-process queues cannot reach the other service's process: nothing would ever be delivered
+        logger.error("❌ BROKER_TYPE=memory only works within one process; use 'file' or 'gcp' for the services")
         sys.exit(1)
     
     logger.info("=" * 70)
     logger.info("🚀 Ingestion Microservice Starting")
     logger.info(f"📡 GCP Project: {project_id}")
-    logger.info(f"📦 Cloud Storage Bucket: {bucket_name}")
+    logger.info(f"📦 Storage: {storage_type}")
+    logger.info(f"📨 Broker: {broker_type}")
     logger.info("=" * 70)
     
     # Initialize ingestion service
-    pubsub = GCPPubSubBroker(project_id)
-    ingestion = DataIngestionService(pubsub, project_id, bucket_name)
+    pubsub = create_broker(broker_type, project_id, **broker_options_from_env(broker_type))
+    store = create_store(storage_type, project_id, bucket_name, **store_options_from_env(storage_type))
+    logger.info(f"📦 Storing segments in {store.describe()}")
+    ingestion = DataIngestionService(
+        pubsub, store,
+        segment_max_bytes=int(os.getenv('SEGMENT_MAX_BYTES', 4_000_000)),
+        segment_max_age=float(os.getenv('SEGMENT_MAX_AGE_SECONDS', 10)),
+        segment_max_messages=int(os.environ['SEGMENT_MAX_MESSAGES']) if os.getenv('SEGMENT_MAX_MESSAGES') else None,
+        segment_format=os.getenv('SEGMENT_FORMAT', 'jsonl').lower(),
+        segment_compression=os.getenv('SEGMENT_COMPRESSION') or None,
+        batch_size=int(os.getenv('INGEST_BATCH_SIZE', 500)),
+        batch_delay=float(os.getenv('INGEST_BATCH_DELAY_SECONDS', 0.05)),
+        high_watermark=int(os.getenv('INGEST_HIGH_WATERMARK', 50_000)),
+        low_watermark=int(os.getenv('INGEST_LOW_WATERMARK', 25_000)),
+        max_outstanding=int(os.getenv('INGEST_MAX_OUTSTANDING', 0)) or None,
+        max_delivery_attempts=int(os.getenv('MAX_DELIVERY_ATTEMPTS', 5)),
+        dead_letter_max_segments=int(os.getenv('DEAD_LETTER_MAX_SEGMENTS', 100)),
+        dedup_key=None if dedup_key == 'off' else dedup_key,
+        dedup_window=float(os.getenv('DEDUP_WINDOW_SECONDS', 600)),
+        dedup_max_memory=int(os.getenv('DEDUP_MAX_MEMORY_MB', 64)) * 1_000_000,
+        wal_dir=os.getenv('WAL_DIR') or None,
+        wal_segment_bytes=int(os.getenv('WAL_SEGMENT_BYTES', 64_000_000)),
+        wal_max_bytes=int(os.getenv('WAL_MAX_MB', 512)) * 1_000_000,
+        wal_commit_delay=float(os.getenv('WAL_COMMIT_DELAY_SECONDS', 0))
+    )
     
     logger.info("✅ Ingestion service ready")
-    logger.info("📥 Consuming from Pub/Sub topics...")
+    logger.info(f"📥 Consuming from {broker_type} broker topics...")
     
     # Start monitoring thread
     ingestion_thread = threading.Thread(target=run_ingestion_loop, daemon=True)
@@ -114,4 +155,5 @@ if __name__ == "__main__":
         if ingestion:
             stats = ingestion.get_stats()
             logger.info(f"📊 Final stats: Total ingested: {stats['total_ingested']}")
+            ingestion.close()
         logger.info("=" * 70)
@@ -0,0 +1,407 @@
+"""
+Segment Writer
+Buffers records per topic and hour, flushes immutable JSONL segments to storage
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+
+from shared import columnar
+from shared.compression import CODECS, EXTENSIONS, compress
+from shared.manifest import (MANIFEST_CONTENT_TYPE, encode_manifest, manifest_path, read_manifest,
+                             segment_entry, timestamp_key)
+from shared.segments import partition_for, segment_path
+
+SEGMENT_FORMATS = ('jsonl', 'parquet')
+JSONL_CONTENT_TYPE = "application/x-ndjson"
+# Page codecs the Parquet writer accepts (None keeps its default, snappy)
+PARQUET_CODECS = (None, 'gzip', 'zstd')
+# Manifests untouched this long are dropped from memory (reloaded if a late record arrives)
+MANIFEST_IDLE_SECONDS = 7200
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AckTracker:
+    """Acks or nacks messages once every segment holding their records is settled
+
+    The writer calls hold() when a buffer takes records of the messages and
+    release(ok) when that buffer has been uploaded (or failed). seal() marks
+    that no more records will be added. All tracked messages share one
+    outcome: acked together, or nacked together if any hold failed.
+    on_settle(ok) runs after they are settled.
+    """
+
+    def __init__(self, *messages, on_settle=None):
+        self.messages = messages
+        self.on_settle = on_settle
+        self._pending = 0
+        self._sealed = False
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def hold(self):
+        with self._lock:
+            self._pending += 1
+
+    def release(self, ok=True):
+        with self._lock:
+            self._pending -= 1
+            self._failed = self._failed or not ok
+            done = self._sealed and self._pending == 0
+        if done:
+            self._settle()
+
+    def seal(self):
+        with self._lock:
+            self._sealed = True
+            done = self._pending == 0
+        if done:
+            self._settle()
+
+    def _settle(self):
+        for message in self.messages:
+            if self._failed:
+                message.nack()
+            else:
+                message.ack()
+        if self.on_settle:
+            self.on_settle(not self._failed)
+
+
+def _estimated_size(record):
+    """Rough uncompressed size of a record, without serializing it"""
+    return sum(len(value) if isinstance(value, str) else 8 for value in record.values())
+
+
+class _Buffer:
+    """Open segment: JSON lines (or records, for columnar output) of one topic and hourly partition"""
+
+    def __init__(self, topic_id, partition):
+        self.topic_id = topic_id
+        self.partition = partition
+        self.items = []
+        self.size = 0
+        self.records = 0
+        self.trackers = set()
+        # Broker messages whose ack waits on this buffer
+        self.messages = 0
+        self.opened_at = time.monotonic()
+        self.min_ts = None
+        self.max_ts = None
+
+
+class _Manifest:
+    """Segment entries this writer added to one topic partition"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        # (entry, outcome) waiting for the next put; outcome gets True or the put's error
+        self.pending = []
+        self.lock = threading.Lock()
+        self.touched = time.monotonic()
+
+
+class SegmentWriter:
+    """Append-only rolling segment writer
+
+    Records are buffered per (topic, hour of their timestamp). A buffer is
+    sealed when it reaches max_bytes or max_age seconds, then uploaded as a
+    new immutable object <topic>/dt=YYYY-MM-DD/hr=HH/<instance>-<seq>.jsonl
+    with append_segment(), which never overwrites, so concurrent writers
+    cannot clobber each other. Trackers attached to a buffer are released
+    after its upload.
+
+    Messages are acked only once their segment is stored, so they stay
+    outstanding at the broker meanwhile, and the subscriber stops
+    delivering at its outstanding-message limit (Pub/Sub flow control).
+    With max_messages set to (somewhat below) that limit, a topic's open
+    buffers are also sealed once they hold that many unacked messages;
+    otherwise consumption stalls until max_age however little is buffered.
+
+    output_format 'parquet' writes typed, dictionary-encoded Parquet
+    segments (.parquet) instead; a buffer whose records do not fit the
+    topic schema is written as JSONL so it is never lost.
+
+    compression ('gzip', 'zstd', ...) compresses JSONL segments as a whole
+    (.jsonl.gz, .jsonl.zst) and is used as the page codec of Parquet
+    segments. Stats report the ratio and CPU cost per codec.
+
+    After each upload the writer replaces its manifest of the partition,
+    _manifests/<topic>/dt=YYYY-MM-DD/hr=HH/<instance>.json, listing every
+    segment with its record count, size, min/max timestamp and checksum.
+    Uploads finishing while a put is in flight are listed together by the
+    next one. Trackers are released only after that put, so a segment
+    missing from the manifests was never acked and its records are
+    redelivered.
+    """
+
+    def __init__(self, store, instance_id=None, max_bytes=4_000_000, max_age=10.0, upload_workers=2,
+                 output_format='jsonl', compression=None, compression_level=None, metrics=None,
+                 max_messages=None):
+        if output_format not in SEGMENT_FORMATS:
+            raise ValueError(f"Unknown segment format: {output_format}")
+        if compression and compression not in CODECS:
+            raise ValueError(f"Unsupported compression: {compression} (available: {', '.join(CODECS)})")
+        if output_format == 'parquet':
+            columnar.require_pyarrow()
+            if compression not in PARQUET_CODECS:
+                raise ValueError(f"Parquet segments support {', '.join(c for c in PARQUET_CODECS if c)} compression")
+
+        self.store = store
+        self.output_format = output_format
+        self.compression = compression
+        self.compression_level = compression_level
+        self._store_latency = None
+        if metrics is not None:
+            self._store_latency = metrics.histogram(
+                'ingestion_stage_seconds', 'Ingestion latency per pipeline stage', ('topic', 'stage')
+            )
+        self.instance_id = instance_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_messages = max_messages
+
+        self._buffers = {}
+        # topic -> unacked messages held by its open buffers
+        self._held = {}
+        self._manifests = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._sealed = queue.Queue()
+        self._stop = threading.Event()
+
+        self.segments_written = 0
+        self.bytes_written = 0
+        self.failed_segments = 0
+        self.fallback_segments = 0
+        self.message_seals = 0
+        # codec -> raw bytes in, stored bytes out, CPU seconds spent encoding
+        self._codec_stats = {}
+
+        self._threads = [threading.Thread(target=self._age_loop, name="segment-age", daemon=True)]
+        for i in range(upload_workers):
+            self._threads.append(threading.Thread(target=self._upload_loop, name=f"segment-upload-{i}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+        logger.info(f"🧱 Segment writer ready: instance {self.instance_id}, {output_format}, "
+                    f"compression {compression or 'none'}, "
+                    f"{max_bytes} bytes / {max_age}s{f' / {max_messages} messages' if max_messages else ''} "
+                    f"per segment")
+
+    def add(self, topic_id, record, tracker=None):
+        """Buffer one record; tracker is released once its segment is durable"""
+        if self.output_format == 'jsonl':
+            item = json.dumps(record) + "\n"
+            size = len(item)
+        else:
+            item = record
+            size = _estimated_size(record)
+        timestamp = record.get("timestamp")
+        partition = partition_for(timestamp)
+        ts = timestamp_key(timestamp)
+        key = (topic_id, partition)
+
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = _Buffer(topic_id, partition)
+            buffer.items.append(item)
+            buffer.size += size
+            buffer.records += 1
+            if ts is not None:
+                if buffer.min_ts is None or ts < buffer.min_ts:
+                    buffer.min_ts = ts
+                if buffer.max_ts is None or ts > buffer.max_ts:
+                    buffer.max_ts = ts
+            if tracker is not None and tracker not in buffer.trackers:
+                tracker.hold()
+                buffer.trackers.add(tracker)
+                buffer.messages += len(tracker.messages)
+                self._held[topic_id] = self._held.get(topic_id, 0) + len(tracker.messages)
+            if buffer.size >= self.max_bytes:
+                self._seal(key)
+            if self.max_messages and self._held.get(topic_id, 0) >= self.max_messages:
+                # Near the subscriber's outstanding limit: upload now so acks free up deliveries
+                self.message_seals += 1
+                for open_key in [k for k in self._buffers if k[0] == topic_id]:
+                    self._seal(open_key)
+
+    def _seal(self, key):
+        """Move an open buffer to the upload queue (caller holds the lock)"""
+        buffer = self._buffers.pop(key)
+        if buffer.messages:
+            self._held[buffer.topic_id] -= buffer.messages
+        self._sequence += 1
+        self._sealed.put((buffer, self._sequence))
+
+    def _age_loop(self):
+        while not self._stop.wait(min(self.max_age / 4, 1.0)):
+            now = time.monotonic()
+            with self._lock:
+                for key in [k for k, b in self._buffers.items() if now - b.opened_at >= self.max_age]:
+                    self._seal(key)
+                for key, manifest in list(self._manifests.items()):
+                    if now - manifest.touched < MANIFEST_IDLE_SECONDS or manifest.pending:
+                        continue
+                    # Busy with a put: evicted on a later pass
+                    if manifest.lock.acquire(blocking=False):
+                        del self._manifests[key]
+                        manifest.lock.release()
+
+    def _upload_loop(self):
+        while True:
+            item = self._sealed.get()
+            if item is None:
+                break
+            buffer, sequence = item
+            # Whatever fails, the buffer's messages are settled and flush() is not left waiting
+            try:
+                ok = self._upload(buffer, sequence)
+            except Exception as e:
+                logger.error(f"❌ Failed to upload a {buffer.topic_id}/{buffer.partition} segment: {e}")
+                with self._lock:
+                    self.failed_segments += 1
+                ok = False
+            try:
+                for tracker in buffer.trackers:
+                    tracker.release(ok)
+            except Exception as e:
+                logger.error(f"❌ Failed to settle {buffer.topic_id} messages: {e}")
+            finally:
+                self._sealed.task_done()
+
+    def _encode(self, buffer):
+        """Serialize a buffer; returns (data, extension, content_type, codec, raw_size)"""
+        if self.output_format == 'parquet':
+            try:
+                data = columnar.encode_parquet(buffer.topic_id, buffer.items, compression=self.compression or 'snappy')
+                codec = f"parquet-{self.compression or 'snappy'}"
+                # Parquet's raw size is the buffered estimate; there is no JSON to compare against
+                return data, columnar.PARQUET_EXTENSION, columnar.PARQUET_CONTENT_TYPE, codec, buffer.size
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning(f"⚠️  {buffer.topic_id} records do not fit the columnar schema, writing JSONL: {e}")
+                with self._lock:
+                    self.fallback_segments += 1
+                lines = [json.dumps(record) + "\n" for record in buffer.items]
+        else:
+            lines = buffer.items
+
+        raw = "".join(lines).encode("utf-8")
+        if not self.compression:
+            return raw, "jsonl", JSONL_CONTENT_TYPE, "none", len(raw)
+        data = compress(raw, self.compression, self.compression_level)
+        return data, f"jsonl.{EXTENSIONS[self.compression]}", JSONL_CONTENT_TYPE, self.compression, len(raw)
+
+    def _upload(self, buffer, sequence):
+        started = time.thread_time()
+        data, extension, content_type, codec, raw_size = self._encode(buffer)
+        cpu_seconds = time.thread_time() - started
+        name = segment_path(buffer.topic_id, buffer.partition, self.instance_id, sequence, extension)
+        started = time.perf_counter()
+        try:
+            self.store.append_segment(name, data, content_type=content_type)
+        except Exception as e:
+            logger.error(f"❌ Failed to write segment {name}: {e}")
+            with self._lock:
+                self.failed_segments += 1
+            return False
+        
+        entry = segment_entry(name, data, buffer.records, buffer.min_ts, buffer.max_ts)
+        try:
+            self._add_to_manifest(buffer.topic_id, buffer.partition, entry)
+        except Exception as e:
+            # Unlisted, the segment is invisible to readers; its records are redelivered
+            logger.error(f"❌ Failed to update the manifest of {buffer.topic_id}/{buffer.partition}: {e}")
+            with self._lock:
+                self.failed_segments += 1
+            return False
+
+        if self._store_latency is not None:
+            self._store_latency.observe(time.perf_counter() - started, buffer.topic_id, 'store')
+        with self._lock:
+            self.segments_written += 1
+            self.bytes_written += len(data)
+            stats = self._codec_stats.setdefault(codec, [0, 0, 0.0])
+            stats[0] += raw_size
+            stats[1] += len(data)
+            stats[2] += cpu_seconds
+        return True
+
+    def _add_to_manifest(self, topic_id, partition, entry):
+        """Atomically replace this writer's manifest of a partition with one or more new entries"""
+        key = (topic_id, partition)
+        name = manifest_path(topic_id, partition, self.instance_id)
+        outcome = []
+        with self._lock:
+            manifest = self._manifests.get(key)
+            if manifest is None:
+                manifest = self._manifests[key] = _Manifest(None)
+            manifest.touched = time.monotonic()
+            manifest.pending.append((entry, outcome))
+
+        with manifest.lock:
+            if not outcome:
+                # Not listed by a put of another upload meanwhile: list every pending entry at once
+                with self._lock:
+                    batch, manifest.pending = manifest.pending, []
+                try:
+                    if manifest.entries is None:
+                        manifest.entries = read_manifest(self.store, name)
+                    entries = manifest.entries + [pending for pending, _ in batch]
+                    self.store.put(name, encode_manifest(topic_id, partition, self.instance_id, entries),
+                                   content_type=MANIFEST_CONTENT_TYPE)
+                    manifest.entries = entries
+                    result = True
+                except Exception as e:
+                    result = e
+                for _, waiting in batch:
+                    waiting.append(result)
+        if outcome[0] is not True:
+            raise outcome[0]
+
+    def flush(self):
+        """Seal all open buffers and wait until they are uploaded"""
+        with self._lock:
+            for key in list(self._buffers):
+                self._seal(key)
+        self._sealed.join()
+
+    def close(self):
+        """Flush everything and stop the background threads"""
+        self.flush()
+        self._stop.set()
+        for _ in self._threads[1:]:
+            self._sealed.put(None)
+        for thread in self._threads:
+            thread.join(5)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "segments_written": self.segments_written,
+                "bytes_written": self.bytes_written,
+                "failed_segments": self.failed_segments,
+                "fallback_segments": self.fallback_segments,
+                "message_seals": self.message_seals,
+                "open_buffers": len(self._buffers),
+                "buffered_records": sum(b.records for b in self._buffers.values()),
+                "compression": {
+                    codec: {
+                        "raw_bytes": raw,
+                        "stored_bytes": stored,
+                        "ratio": round(raw / stored, 2) if stored else 0.0,
+                        "cpu_seconds": round(cpu, 3),
+                        "cpu_ms_per_mb": round(cpu * 1000 / (raw / 1_000_000), 2) if raw else 0.0
+                    }
+                    for codec, (raw, stored, cpu) in self._codec_stats.items()
+                }
+            }
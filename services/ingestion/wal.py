@@ -0,0 +1,352 @@
+"""
+Write-Ahead Log
+Local, group-committed log that makes records durable before their messages are acked
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+from .segment_writer import AckTracker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Frame header: payload length, CRC32 of the payload (big-endian uint32)
+FRAME_HEADER = struct.Struct('>II')
+WAL_SUFFIX = ".wal"
+# Backoff between attempts to hand logged records to the sink again (doubling up to the max)
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 30.0
+
+
+class _WalSegment:
+    """One log file; deleted once it is closed and all of its frames are in the object store"""
+
+    def __init__(self, sequence, path, size=0, closed=False):
+        self.sequence = sequence
+        self.path = path
+        self.size = size
+        self.closed = closed
+        self.pins = 0
+
+
+class WriteAheadLog:
+    """Append-only log of record batches under directory
+
+    append() queues a batch as one CRC-checked frame and returns at once.
+    A single committer thread writes every queued frame and fsyncs once
+    (group commit), then releases the batch's tracker, so messages are
+    acked after a local fsync instead of a remote upload, and hands the
+    records to sink(topic_id, records, pin). The sink passes pin to the
+    segment writer; a frame's log file is kept until every pin of it has
+    been released ok. A failed upload, or a sink that raises, hands the
+    records to the sink again from a retry thread, with a backoff doubling
+    from RETRY_BASE_SECONDS to RETRY_MAX_SECONDS.
+
+    Log files (<seq>.wal) roll at segment_bytes. On start, the files of an
+    earlier run are replayed into the sink; a torn frame at the end of a
+    file (crash mid-write) ends its replay. A file is kept until all of its
+    frames are dispatched and uploaded, so records uploaded just before a
+    crash, or from a partly replayed file, may be stored twice. append() blocks while more than
+    max_live_bytes are logged but not yet uploaded, which in turn pauses
+    the batcher.
+    """
+
+    def __init__(self, directory, sink, segment_bytes=64_000_000, max_live_bytes=512_000_000,
+                 commit_delay=0.0, metrics=None):
+        self.directory = directory
+        self.sink = sink
+        self.segment_bytes = segment_bytes
+        self.max_live_bytes = max_live_bytes
+        self.commit_delay = commit_delay
+        self._fsync_latency = None
+        if metrics is not None:
+            self._fsync_latency = metrics.histogram('ingestion_wal_fsync_seconds', 'WAL group commit latency')
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending = []
+        self._segments = {}
+        self._live_bytes = 0
+        self._lock = threading.Lock()
+        self._queued = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._retry_ready = threading.Condition(self._lock)
+        # (due, id, segment, topic_id, records, size, attempt) of records to dispatch again
+        self._retries = []
+        self._retry_ids = itertools.count()
+        self._stop = False
+
+        self.appends = 0
+        self.commits = 0
+        self.bytes_logged = 0
+        self.replayed_records = 0
+        self.failed_commits = 0
+        self.retried_uploads = 0
+
+        previous = self._existing_segments()
+        sequence = previous[-1].sequence if previous else 0
+        self._fd = None
+        self._current = None
+        self._open_segment(sequence + 1)
+
+        self._thread = threading.Thread(target=self._commit_loop, name="wal-commit", daemon=True)
+        self._thread.start()
+        self._retry_thread = threading.Thread(target=self._retry_loop, name="wal-retry", daemon=True)
+        self._retry_thread.start()
+
+        logger.info(f"📝 Write-ahead log ready: {os.path.abspath(directory)}, "
+                    f"{segment_bytes} bytes per file, {len(previous)} file(s) to replay")
+        self._previous = previous
+
+    def _path(self, sequence):
+        return os.path.join(self.directory, f"{sequence:012d}{WAL_SUFFIX}")
+
+    def _existing_segments(self):
+        segments = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(WAL_SUFFIX) and name[:-len(WAL_SUFFIX)].isdigit():
+                path = os.path.join(self.directory, name)
+                segment = _WalSegment(int(name[:-len(WAL_SUFFIX)]), path, os.path.getsize(path), closed=True)
+                self._segments[segment.sequence] = segment
+                segments.append(segment)
+        return segments
+
+    def _open_segment(self, sequence):
+        """Start a new log file and make its directory entry durable"""
+        path = self._path(sequence)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._fsync_directory()
+        self._current = self._segments[sequence] = _WalSegment(sequence, path)
+
+    def _fsync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def replay(self) -> int:
+        """Hand the records of an earlier run's log files to the sink; returns the record count"""
+        replayed = 0
+        for segment in self._previous:
+            # Pinned until every frame is dispatched: uploads of early frames must not delete the file
+            with self._lock:
+                segment.pins += 1
+            dispatched = True
+            with open(segment.path, 'rb') as f:
+                for topic_id, records in self._read_frames(f, segment.path):
+                    dispatched = self._dispatch(segment, topic_id, records) and dispatched
+                    replayed += len(records)
+            if not dispatched:
+                # Kept for the next run, which replays the whole file again
+                logger.error(f"❌ {segment.path} was not fully replayed, keeping it")
+                continue
+            with self._lock:
+                segment.pins -= 1
+            self._maybe_delete(segment)
+        self._previous = []
+        with self._lock:
+            self.replayed_records += replayed
+        if replayed:
+            logger.info(f"♻️  Replayed {replayed} records from the write-ahead log")
+        return replayed
+
+    def _read_frames(self, f, path):
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if not header:
+                return
+            if len(header) < FRAME_HEADER.size:
+                logger.warning(f"⚠️  Torn frame header at the end of {path}")
+                return
+            length, checksum = FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                logger.warning(f"⚠️  Torn or corrupt frame in {path}, replaying up to it")
+                return
+            entry = json.loads(payload)
+            yield entry["topic"], entry["records"]
+
+    def append(self, topic_id, records, tracker=None):
+        """Queue records for the next group commit; tracker is released once they are fsynced"""
+        payload = json.dumps({"topic": topic_id, "records": records}).encode("utf-8")
+        frame = FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        if tracker is not None:
+            tracker.hold()
+
+        with self._lock:
+            # Bound what is logged but not yet uploaded
+            if self._live_bytes > self.max_live_bytes and not self._stop:
+                logger.warning(f"⚠️  Write-ahead log holds {self._live_bytes} bytes not yet uploaded "
+                               f"({len(self._retries)} batches awaiting retry), appends wait")
+            while self._live_bytes > self.max_live_bytes and not self._stop:
+                self._drained.wait(0.5)
+            self._live_bytes += len(frame)
+            self._pending.append((topic_id, records, frame, tracker))
+            self.appends += 1
+            self._queued.notify()
+
+    def _commit_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._stop:
+                    self._queued.wait()
+                if not self._pending:
+                    break
+            if self.commit_delay:
+                # Let more appends join this commit
+                time.sleep(self.commit_delay)
+            with self._lock:
+                batch, self._pending = self._pending, []
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """Write a group of frames with one fsync, then ack and dispatch them"""
+        data = b"".join(frame for _, _, frame, _ in batch)
+        segment = self._current
+        started = time.perf_counter()
+        try:
+            remaining = memoryview(data)
+            while remaining:
+                written = os.write(self._fd, remaining)
+                if not written:
+                    raise OSError("write-ahead log write made no progress")
+                remaining = remaining[written:]
+            os.fsync(self._fd)
+            ok = True
+        except OSError as e:
+            logger.error(f"❌ Write-ahead log commit of {len(batch)} batches failed: {e}")
+            ok = False
+
+        if self._fsync_latency is not None:
+            self._fsync_latency.observe(time.perf_counter() - started)
+        with self._lock:
+            if ok:
+                self.commits += 1
+                self.bytes_logged += len(data)
+                segment.size += len(data)
+            else:
+                self.failed_commits += 1
+
+        for topic_id, records, frame, tracker in batch:
+            if ok:
+                self._dispatch(segment, topic_id, records, len(frame))
+            else:
+                self._unlive(len(frame))
+            if tracker is not None:
+                tracker.release(ok)
+
+        # After a failed write the file may end in a torn frame: keep later frames out of it
+        if not ok or segment.size >= self.segment_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        previous = self._current
+        try:
+            os.close(self._fd)
+            self._open_segment(previous.sequence + 1)
+        except OSError as e:
+            logger.error(f"❌ Could not roll the write-ahead log: {e}")
+            return
+        with self._lock:
+            previous.closed = True
+        self._maybe_delete(previous)
+
+    def _dispatch(self, segment, topic_id, records, size=0, pinned=False, attempt=0) -> bool:
+        """Hand records to the sink, pinning segment until they are uploaded; False if the sink failed"""
+        if not pinned:
+            with self._lock:
+                segment.pins += 1
+        pin = AckTracker(on_settle=lambda ok: self._unpinned(segment, topic_id, records, size, attempt, ok))
+        try:
+            self.sink(topic_id, records, pin)
+            return True
+        except Exception as e:
+            # Still pinned and in the log: retried later, or replayed by the next run
+            logger.error(f"❌ {topic_id} write-ahead log sink failed (attempt {attempt + 1}): {e}")
+            self._retry_later(segment, topic_id, records, size, attempt)
+            return False
+
+    def _unpinned(self, segment, topic_id, records, size, attempt, ok):
+        if not ok:
+            # Still in the log: try the upload again later, the segment stays pinned meanwhile
+            self._retry_later(segment, topic_id, records, size, attempt)
+            return
+        with self._lock:
+            segment.pins -= 1
+        self._unlive(size)
+        self._maybe_delete(segment)
+
+    def _retry_later(self, segment, topic_id, records, size, attempt):
+        delay = min(RETRY_BASE_SECONDS * 2 ** attempt, RETRY_MAX_SECONDS)
+        with self._lock:
+            self.retried_uploads += 1
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._retry_ids),
+                                           segment, topic_id, records, size, attempt + 1))
+            self._retry_ready.notify()
+
+    def _retry_loop(self):
+        while True:
+            with self._lock:
+                while not self._stop and (not self._retries or self._retries[0][0] > time.monotonic()):
+                    self._retry_ready.wait(self._retries[0][0] - time.monotonic() if self._retries else None)
+                if self._stop:
+                    # Pending retries stay pinned in the log and are replayed by the next run
+                    return
+                _, _, segment, topic_id, records, size, attempt = heapq.heappop(self._retries)
+            self._dispatch(segment, topic_id, records, size, pinned=True, attempt=attempt)
+
+    def _unlive(self, size):
+        with self._lock:
+            self._live_bytes -= size
+            self._drained.notify_all()
+
+    def _maybe_delete(self, segment):
+        with self._lock:
+            if not segment.closed or segment.pins or self._segments.get(segment.sequence) is not segment:
+                return
+            del self._segments[segment.sequence]
+        try:
+            os.remove(segment.path)
+        except OSError as e:
+            logger.warning(f"⚠️  Could not remove {segment.path}: {e}")
+
+    def close(self):
+        """Commit queued appends and close the current log file
+
+        Files still pinned by records that have not been uploaded are kept
+        and replayed by the next run.
+        """
+        with self._lock:
+            self._stop = True
+            self._queued.notify_all()
+            self._drained.notify_all()
+            self._retry_ready.notify_all()
+        self._thread.join(10)
+        self._retry_thread.join(10)
+        os.close(self._fd)
+        with self._lock:
+            self._current.closed = True
+        self._maybe_delete(self._current)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "appends": self.appends,
+                "commits": self.commits,
+                "batches_per_commit": round(self.appends / self.commits, 2) if self.commits else 0.0,
+                "bytes_logged": self.bytes_logged,
+                "live_bytes": self._live_bytes,
+                "files": len(self._segments),
+                "replayed_records": self.replayed_records,
+                "failed_commits": self.failed_commits,
+                "retried_uploads": self.retried_uploads,
+                "pending_retries": len(self._retries)
+            }
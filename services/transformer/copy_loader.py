@@ -0,0 +1,167 @@
+"""
+COPY Loader
+Streams transformed rows into PostgreSQL with COPY ... FROM STDIN (text or binary format)
+"""
+
+import io
+import logging
+import math
+import struct
+from datetime import datetime
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COPY_FORMATS = ('text', 'binary')
+
+# Column types of the transformer's tables: 'ts' TIMESTAMP, 'str' VARCHAR, 'int' INTEGER,
+# 'num' DECIMAL(p, 2)
+TABLE_TYPES = {
+    'server_metrics': {
+        'timestamp': 'ts', 'server_id': 'str', 'region': 'str', 'environment': 'str',
+        'cpu_percent': 'num', 'memory_percent': 'num', 'memory_used_gb': 'num',
+        'memory_total_gb': 'int', 'disk_used_gb': 'int', 'disk_total_gb': 'int',
+        'disk_utilization': 'num', 'status': 'str'
+    },
+    'container_metrics': {
+        'timestamp': 'ts', 'container_id': 'str', 'service_name': 'str', 'version': 'str',
+        'environment': 'str', 'cpu_percent': 'num', 'memory_mb': 'int', 'memory_limit_mb': 'int',
+        'memory_utilization': 'num', 'requests_per_sec': 'int', 'response_time_ms': 'num',
+        'error_count': 'int', 'restart_count': 'int', 'health': 'str'
+    },
+    'service_metrics': {
+        'timestamp': 'ts', 'service_name': 'str', 'version': 'str', 'environment': 'str',
+        'region': 'str', 'total_requests': 'int', 'failed_requests': 'int', 'success_rate': 'num',
+        'error_rate_percent': 'num', 'avg_response_time_ms': 'num', 'p95_response_time_ms': 'num',
+        'instances_running': 'int', 'cpu_avg_percent': 'num', 'memory_avg_percent': 'num'
+    }
+}
+NUMERIC_SCALE = 2
+
+# Binary COPY framing
+BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+BINARY_TRAILER = struct.pack('>h', -1)
+PG_EPOCH = datetime(2000, 1, 1)
+_INT16 = struct.Struct('>h')
+_INT32_FIELD = struct.Struct('>ii')
+_INT64_FIELD = struct.Struct('>iq')
+_NULL_FIELD = struct.pack('>i', -1)
+_NUMERIC_HEADER = struct.Struct('>ihhHH')
+
+_TEXT_SPECIALS = ('\\', '\t', '\n', '\r')
+
+
+def _escape_text(value):
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _text_column(kind, values):
+    """COPY text rendering of one column (NULL as \\N)"""
+    if kind == 'ts':
+        rendered = [value if isinstance(value, str) else value.isoformat() for value in values]
+    else:
+        rendered = list(map(str, values))
+    if kind == 'str':
+        joined = ''.join(rendered)
+        if any(special in joined for special in _TEXT_SPECIALS):
+            rendered = [_escape_text(value) for value in rendered]
+    if None in values:
+        rendered = ['\\N' if value is None else text for value, text in zip(values, rendered)]
+    return rendered
+
+
+def _timestamp_micros(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value[:-1] if value.endswith('Z') else value)
+    delta = value.replace(tzinfo=None) - PG_EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _numeric(value, scale=NUMERIC_SCALE):
+    """NUMERIC binary field: base-10000 digit groups around the decimal point"""
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"{value} does not fit a DECIMAL column")
+    scaled = round(value * 10 ** scale)
+    sign = 0x4000 if scaled < 0 else 0
+    integer, fraction = divmod(abs(scaled), 10 ** scale)
+
+    groups = -(-scale // 4)
+    fraction *= 10 ** (groups * 4 - scale)
+    digits = []
+    for _ in range(groups):
+        fraction, digit = divmod(fraction, 10000)
+        digits.append(digit)
+    digits.reverse()
+    weight = -1
+    while integer:
+        integer, digit = divmod(integer, 10000)
+        digits.insert(0, digit)
+        weight += 1
+
+    # Leading and trailing zero groups are implied by weight and dscale
+    while digits and digits[0] == 0:
+        digits.pop(0)
+        weight -= 1
+    while digits and digits[-1] == 0:
+        digits.pop()
+    if not digits:
+        weight, sign = 0, 0
+    body = _NUMERIC_HEADER.pack(8 + 2 * len(digits), len(digits), weight, sign, scale)
+    return body + struct.pack(f'>{len(digits)}H', *digits)
+
+
+def _binary_field(kind, value):
+    if value is None:
+        return _NULL_FIELD
+    if kind == 'int':
+        return _INT32_FIELD.pack(4, value)
+    if kind == 'num':
+        return _numeric(value)
+    if kind == 'ts':
+        return _INT64_FIELD.pack(8, _timestamp_micros(value))
+    data = str(value).encode('utf-8')
+    return struct.pack('>i', len(data)) + data
+
+
+class CopyLoader:
+    """Bulk loader using COPY <table> (<columns>) FROM STDIN
+
+    Rows are rendered column by column into one in-memory buffer, with no
+    per-row SQL: 'text' renders values with str() and joins them with tabs,
+    'binary' packs PostgreSQL's binary COPY format (INTEGER, DECIMAL,
+    TIMESTAMP and VARCHAR columns of the transformer's tables).
+    """
+
+    def __init__(self, copy_format='text'):
+        if copy_format not in COPY_FORMATS:
+            raise ValueError(f"Unknown COPY format: {copy_format}")
+        self.copy_format = copy_format
+
+    def encode(self, table_name, columns, records) -> bytes:
+        """COPY payload of records (dicts with at least columns)"""
+        types = TABLE_TYPES[table_name]
+        if self.copy_format == 'text':
+            rendered = [_text_column(types[name], [record[name] for record in records]) for name in columns]
+            return ''.join('\t'.join(row) + '\n' for row in zip(*rendered)).encode('utf-8')
+
+        kinds = [types[name] for name in columns]
+        row_header = _INT16.pack(len(columns))
+        fields = [[_binary_field(kind, record[name]) for record in records] for name, kind in zip(columns, kinds)]
+        parts = [BINARY_HEADER]
+        for row in zip(*fields):
+            parts.append(row_header)
+            parts.extend(row)
+        parts.append(BINARY_TRAILER)
+        return b''.join(parts)
+
+    def statement(self, table_name, columns) -> str:
+        options = " WITH (FORMAT binary)" if self.copy_format == 'binary' else ""
+        return f"COPY {table_name} ({', '.join(columns)}) FROM STDIN{options}"
+
+    def load(self, cursor, table_name, records, target=None):
+        """COPY records of table_name into target (default table_name) on cursor, without committing"""
+        if not records:
+            return
+        columns = list(records[0].keys())
+        payload = io.BytesIO(self.encode(table_name, columns, records))
+        cursor.copy_expert(self.statement(target or table_name, columns), payload)
@@ -9,11 +9,13 @@ import sys
 import time
 import logging
 import threading
+from datetime import datetime, timedelta
 from flask import Flask, jsonify
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
+from shared import create_store, store_options_from_env
 from services.transformer import DataTransformerService
 
 logging.basicConfig(level=logging.INFO)
@@ -27,13 +29,22 @@ transformer_thread = None
 def run_transformer_loop():
     """Background thread running transformer ETL loop"""
     global transformer
+    # Cycles consider only segments overlapping the last TRANSFORM_LOOKBACK_HOURS (0 = all). The
+    # first cycle and every TRANSFORM_FULL_SCAN_CYCLES-th one list every manifest, so segments that
+    # fell out of the window before they were loaded (downtime, late or old timestamps) still are
+    lookback_hours = float(os.getenv('TRANSFORM_LOOKBACK_HOURS', 24))
+    full_scan_cycles = int(os.getenv('TRANSFORM_FULL_SCAN_CYCLES', 60))
     try:
         round_num = 0
         while True:
             round_num += 1
-            logger.info(f"\n[{round_num:04d}] 🔄 Starting ETL cycle...")
+            full_scan = round_num == 1 or (full_scan_cycles and (round_num - 1) % full_scan_cycles == 0)
+            logger.info(f"\n[{round_num:04d}] 🔄 Starting ETL cycle{' (all manifests)' if full_scan else ''}...")
             
-            transformer.run_etl()
+            start = None
+            if lookback_hours and not full_scan:
+                start = datetime.utcnow() - timedelta(hours=lookback_hours)
+            transformer.run_etl(start)
             
             stats = transformer.get_stats()
             logger.info(f"📊 Total transformed: {stats['total_transformed']}")
@@ -73,6 +84,7 @@ def main():
     """Run Transformer Service independently"""
     project_id = os.getenv('GCP_PROJECT_ID')
     bucket_name = os.getenv('GCP_BUCKET_NAME')
+    storage_type = os.getenv('STORAGE_TYPE', 'gcs').lower()
     
     # Database configuration
     db_config = {
@@ -90,22 +102,30 @@ def main():
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = cred_path
             logger.info(f"🔑 Using service account: {cred_path}")
     
-    if not all([project_id, bucket_name, db_config['host'], db_config['database'], db_config['user'], db_config['password']]):
+    storage_ready = storage_type != 'gcs' or (project_id and bucket_name)
+    if not storage_ready or not all([db_config['host'], db_config['database'], db_config['user'], db_config['password']]):
         logger.error("❌ Missing required environment variables")
-        logger.error("Required: GCP_PROJECT_ID, GCP_BUCKET_NAME, DB_HOST, DB_NAME, DB_USER, DB_PASSWORD")
+        logger.error("Required: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD (and GCP_PROJECT_ID, GCP_BUCKET_NAME for GCS storage)")
         sys.exit(1)
     
     logger.info("=" * 70)
     logger.info("🚀 Transformer Microservice Starting")
     logger.info(f"📡 GCP Project: {project_id}")
-    logger.info(f"📦 Cloud Storage Bucket: {bucket_name}")
+    logger.info(f"📦 Storage: {storage_type}")
     logger.info(f"🗄️  PostgreSQL Database: {db_config['database']}")
     logger.info("=" * 70)
     
     try:
         # Initialize transformer service (global for thread)
         global transformer
-        transformer = DataTransformerService(project_id, bucket_name, db_config)
+        store = create_store(storage_type, project_id, bucket_name, **store_options_from_env(storage_type))
+        transformer = DataTransformerService(
+            store, db_config, chunk_size=int(os.getenv('TRANSFORM_CHUNK_RECORDS', 5000)),
+            load_method=os.getenv('TRANSFORM_LOAD_METHOD', 'copy-text').lower(),
+            load_mode=os.getenv('TRANSFORM_LOAD_MODE', 'merge').lower(),
+            workers=int(os.getenv('TRANSFORM_WORKERS', 3)),
+            dedupe_natural_keys=os.getenv('TRANSFORM_DEDUPE_NATURAL_KEYS', 'false').lower() == 'true'
+        )
         
         logger.info("✅ Transformer service ready")
         logger.info("🔄 Running ETL every 60 seconds...")
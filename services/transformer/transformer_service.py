@@ -1,35 +1,112 @@
 """
 Data Transformer Microservice (ETL)
-Consumes from Cloud Storage, transforms data, loads to PostgreSQL
+Consumes from object storage (GCS or local disk), transforms data, loads to PostgreSQL
 """
 
-from google.cloud import storage
-from google.cloud import pubsub_v1
-from google.api_core import exceptions as gexc
 import psycopg2
 from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import json
 import logging
+import os
+import resource
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from shared.columnar import PARQUET_EXTENSION, iter_parquet_records
+from shared.compression import codec_for_name, decompress_stream
+from shared.manifest import find_segments
+from shared.object_store import STREAM_CHUNK_SIZE
+from shared.segments import topic_prefix
+from shared.validation import VALIDATORS
+from .copy_loader import COPY_FORMATS, CopyLoader
+
+# copy-text / copy-binary stream rows with COPY FROM STDIN; values is the execute_values INSERT path
+LOAD_METHODS = tuple(f"copy-{copy_format}" for copy_format in COPY_FORMATS) + ('values',)
+
+# merge stages rows in a temp table and inserts them with ON CONFLICT DO NOTHING; append inserts directly
+LOAD_MODES = ('merge', 'append')
+
+# One row per sample: the unique key each metric table is deduplicated on
+NATURAL_KEYS = {
+    'server_metrics': ('server_id', 'timestamp'),
+    'container_metrics': ('container_id', 'timestamp'),
+    'service_metrics': ('service_name', 'version', 'environment', 'region', 'timestamp'),
+}
+# Key columns that may be NULL are indexed as COALESCE(column, ''): a plain unique index treats NULLs
+# as distinct, so replayed samples without a region (say) would never conflict
+NULLABLE_KEY_COLUMNS = {
+    'service_metrics': ('version', 'environment', 'region'),
+}
+
+
+def _key_expressions(table_name, alias=''):
+    """Natural-key index expressions of a table, columns qualified with alias if given"""
+    nullable = NULLABLE_KEY_COLUMNS.get(table_name, ())
+    prefix = f"{alias}." if alias else ''
+    return [f"COALESCE({prefix}{column}, '')" if column in nullable else f"{prefix}{column}"
+            for column in NATURAL_KEYS[table_name]]
+
+# Byte offset per source object, committed in the same transaction as the rows loaded from it
+CHECKPOINT_TABLE = "etl_checkpoints"
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _rss_bytes():
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Not Linux: the process-lifetime peak (kilobytes on Linux, bytes on macOS) is the best available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
 class DataTransformerService:
-    """ETL microservice - Extract from GCS, Transform, Load to PostgreSQL"""
+    """ETL microservice - Extract from object storage, Transform, Load to PostgreSQL"""
     
-    def __init__(self, project_id, bucket_name, db_config):
-        self.project_id = project_id
-        self.bucket_name = bucket_name
+    def __init__(self, store, db_config, chunk_size=5000, read_size=STREAM_CHUNK_SIZE, load_method='copy-text',
+                 load_mode='merge', workers=3, dedupe_natural_keys=False):
+        if load_method not in LOAD_METHODS:
+            raise ValueError(f"Unknown load method: {load_method} (available: {', '.join(LOAD_METHODS)})")
+        if load_mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode: {load_mode} (available: {', '.join(LOAD_MODES)})")
+        self.load_mode = load_mode
+        # Opt-in: deletes duplicate rows from the metric tables when adding their natural-key indexes
+        self.dedupe_natural_keys = dedupe_natural_keys
+        self.store = store
         self.db_config = db_config
+        self.copy_loader = CopyLoader(load_method[len('copy-'):]) if load_method.startswith('copy-') else None
+        # Records per transform/insert chunk and bytes per ranged read: together they bound memory
+        self.chunk_size = chunk_size
+        self.read_size = read_size
         self.transformed_count = 0
+        self.invalid_count = 0
+        self.checkpointed_count = 0
+        self.conflict_count = 0
+        self.duplicate_count = 0
+        self._cycle_peak_rss = 0
+        self.last_cycle_peak_rss = 0
+        # Counters above are updated from every topic worker
+        self._lock = threading.Lock()
+        self.topic_stats = {}
+        self._manifested = set()
         
-        # Initialize Cloud Storage
-        self.storage_client = storage.Client(project=project_id)
-        self.bucket = self.storage_client.bucket(bucket_name)
+        self.transforms = {
+            'server_metrics': self.transform_server_metrics,
+            'container_metrics': self.transform_container_metrics,
+            'service_metrics': self.transform_service_metrics,
+        }
+        # One worker (and one pooled connection) per topic pipeline at most
+        self.workers = max(1, min(workers, len(self.transforms)))
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="etl")
         
-        logger.info(f"✅ Connected to GCS Bucket: {bucket_name}")
+        logger.info(f"✅ Reading from {store.describe()}")
         
         # Connect to PostgreSQL
         self._connect_db()
@@ -38,17 +115,26 @@ class DataTransformerService:
         logger.info("✅ Transformer service initialized")
     
     def _connect_db(self):
-        """Connect to Cloud SQL PostgreSQL"""
+        """Connect to Cloud SQL PostgreSQL
+        
+        self.conn (schema setup, load_to_postgres) and one connection per
+        topic worker come from a pool that keeps all of them open, so
+        workers never wait on each other's transactions or reconnect
+        every cycle.
+        """
         try:
-            self.conn = psycopg2.connect(
+            size = self.workers + 1
+            self.pool = ThreadedConnectionPool(
+                size, size,
                 host=self.db_config['host'],
                 port=self.db_config.get('port', 5432),
                 database=self.db_config['database'],
                 user=self.db_config['user'],
                 password=self.db_config['password']
             )
+            self.conn = self.pool.getconn()
             self.conn.autocommit = False
-            logger.info(f"✅ Connected to PostgreSQL: {self.db_config['database']}")
+            logger.info(f"✅ Connected to PostgreSQL: {self.db_config['database']} ({size} pooled connections)")
         except Exception as e:
             logger.error(f"❌ Failed to connect to PostgreSQL: {e}")
             raise
@@ -136,26 +222,175 @@ class DataTransformerService:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_service_name ON service_metrics(service_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_service_environment ON service_metrics(environment)")
         
+        self._ensure_natural_keys(cursor)
+        
+        # Extraction checkpoints
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                source TEXT PRIMARY KEY,
+                topic VARCHAR(50) NOT NULL,
+                byte_offset BIGINT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
         self.conn.commit()
         logger.info("📋 Database tables ready")
     
-    def extract_from_gcs(self, filename):
-        """Extract JSONL data from Cloud Storage"""
-        try:
-            blob = self.bucket.blob(filename)
-            content = blob.download_as_string().decode('utf-8')
+    def _ensure_natural_keys(self, cursor):
+        """Add the natural-key unique indexes
+        
+        A table holding duplicates loaded before the index existed is left
+        without it (merge loads then cannot skip replayed samples) and an
+        error is logged. Only with dedupe_natural_keys are the duplicates
+        deleted first, keeping the first copy of every sample. An index
+        from before nullable key columns were coalesced is replaced.
+        """
+        for table_name in NATURAL_KEYS:
+            index = f"uq_{table_name}_natural_key"
+            cursor.execute("SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname = %s",
+                           (table_name, index))
+            row = cursor.fetchone()
+            outdated = row is not None and table_name in NULLABLE_KEY_COLUMNS and 'COALESCE' not in row[0].upper()
+            if row is not None and not outdated:
+                continue
+            
+            if self.dedupe_natural_keys:
+                matches = ' AND '.join(f"{a} = {b}" for a, b in zip(_key_expressions(table_name, 'a'),
+                                                                      _key_expressions(table_name, 'b')))
+                cursor.execute(f"""
+                    DELETE FROM {table_name} a USING {table_name} b
+                    WHERE a.id > b.id AND {matches}
+                """)
+                logger.warning(f"🧹 Removed {cursor.rowcount} duplicate rows from {table_name}")
             
-            # Parse JSONL (one JSON per line)
-            records = []
-            for line in content.strip().split('\n'):
+            # Rolled back with the savepoint, an outdated index stays in place
+            cursor.execute("SAVEPOINT natural_key")
+            try:
+                if outdated:
+                    cursor.execute(f"DROP INDEX {index}")
+                cursor.execute(f"CREATE UNIQUE INDEX {index} ON {table_name} ({', '.join(_key_expressions(table_name))})")
+                cursor.execute("RELEASE SAVEPOINT natural_key")
+                logger.info(f"✅ Added natural-key index {index}")
+            except psycopg2.IntegrityError:
+                cursor.execute("ROLLBACK TO SAVEPOINT natural_key")
+                state = "keeps its outdated natural-key index" if outdated else "has no natural-key index"
+                logger.error(f"❌ {table_name} holds duplicate samples, so it {state}: restart once "
+                             f"with TRANSFORM_DEDUPE_NATURAL_KEYS=true to delete them and add it")
+    
+    def extract_object(self, name, offset=0):
+        """Stream complete JSONL lines of a stored object from byte offset on
+        
+        Yields (records, end) per chunk of up to chunk_size records, where end
+        is the offset just past the chunk's last line. Bytes are fetched with
+        ranged reads of read_size; a line still being written is left for
+        the next run.
+        """
+        position = offset
+        pending = b''
+        records = []
+        while True:
+            data = self.store.get(name, start=position + len(pending), end=position + len(pending) + self.read_size)
+            if not data:
+                break
+            lines = (pending + data).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                position += len(line) + 1
                 if line:
                     records.append(json.loads(line))
-            
-            logger.info(f"📥 Extracted {len(records)} records from {filename}")
+                    if len(records) >= self.chunk_size:
+                        yield records, position
+                        records = []
+            if len(data) < self.read_size:
+                break
+        if records:
+            yield records, position
+    
+    def segments_for(self, topic_id, start=None, end=None):
+        """(name, size) of a topic's segments that may hold records in [start, end)
+        
+        Uses the ingestion manifests, pruning by their time bounds; topics
+        without manifests fall back to listing every segment.
+        """
+        entries = find_segments(self.store, topic_id, start, end, probe=topic_id not in self._manifested)
+        if entries is None:
+            return [(info.name, info.size) for info in self.store.list(topic_prefix(topic_id))]
+        # Once a topic has manifests, a window without any need not list the whole topic again
+        self._manifested.add(topic_id)
+        return [(entry["path"], entry["bytes"]) for entry in entries]
+    
+    def sources_for(self, topic_id, start=None, end=None):
+        """(name, size) of every object a topic is extracted from: the legacy log, then segments"""
+        legacy = f"{topic_id}.jsonl"
+        try:
+            sources = [(legacy, self.store.stat(legacy).size)]
+        except FileNotFoundError:
+            sources = []
+        return sources + self.segments_for(topic_id, start, end)
+    
+    def _checkpoints(self, conn, sources):
+        """Committed byte offset of each source (0 if never loaded)"""
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT source, byte_offset FROM {CHECKPOINT_TABLE} WHERE source = ANY(%s)", (sources,))
+        offsets = dict(cursor.fetchall())
+        conn.commit()
+        return {source: offsets.get(source, 0) for source in sources}
+    
+    def pending_sources(self, topic_id, start=None, end=None, conn=None):
+        """(name, offset, size) of a topic's sources with bytes past their checkpoint"""
+        sources = self.sources_for(topic_id, start, end)
+        offsets = self._checkpoints(conn or self.conn, [name for name, _ in sources])
+        return [(name, offsets[name], size) for name, size in sources if offsets[name] != size]
+    
+    def _segment_chunks(self, name):
+        """Records of a segment in lists of up to chunk_size; columnar segments are already typed
+        
+        JSONL segments (optionally .gz/.zst compressed) are streamed and
+        decompressed chunk by chunk instead of being downloaded whole.
+        """
+        if name.endswith(f".{PARQUET_EXTENSION}"):
+            yield from iter_parquet_records(self.store.get(name), self.chunk_size)
+            return
+        records = []
+        for record in self._iter_jsonl(decompress_stream(self.store.stream(name), codec_for_name(name))):
+            records.append(record)
+            if len(records) >= self.chunk_size:
+                yield records
+                records = []
+        if records:
+            yield records
+    
+    @staticmethod
+    def _iter_jsonl(chunks):
+        """Parse JSONL (one JSON per line) from a stream of byte chunks"""
+        pending = b''
+        for chunk in chunks:
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                if line:
+                    yield json.loads(line)
+        if pending.strip():
+            yield json.loads(pending)
+    
+    def drop_invalid(self, topic_id, records):
+        """Drop rows that would break transform_* (e.g. legacy blobs written before validation)"""
+        errors = VALIDATORS[topic_id].validate_batch(records)
+        invalid = len(records) - errors.count(None)
+        if not invalid:
             return records
-        except Exception as e:
-            logger.error(f"❌ Failed to extract from {filename}: {e}")
-            return []
+        
+        with self._lock:
+            self.invalid_count += invalid
+        first = next(error for error in errors if error is not None)
+        logger.warning(f"⚠️  Skipping {invalid} invalid {topic_id} records (first: {first})")
+        return [record for record, error in zip(records, errors) if error is None]
+    
+    @staticmethod
+    def _timestamp(value):
+        """Naive UTC timestamp for PostgreSQL from an ISO string or a datetime"""
+        return value.replace('Z', '') if isinstance(value, str) else value
     
     def transform_server_metrics(self, records):
         """Transform server metrics"""
@@ -165,7 +400,7 @@ class DataTransformerService:
             disk_util = (record['disk_used_gb'] / record['disk_total_gb'] * 100) if record['disk_total_gb'] > 0 else 0
             
             transformed.append({
-                'timestamp': record['timestamp'].replace('Z', ''),
+                'timestamp': self._timestamp(record['timestamp']),
                 'server_id': record['server_id'],
                 'region': record['region'],
                 'environment': record['environment'],
@@ -189,7 +424,7 @@ class DataTransformerService:
             mem_util = (record['memory_mb'] / record['memory_limit_mb'] * 100) if record['memory_limit_mb'] > 0 else 0
             
             transformed.append({
-                'timestamp': record['timestamp'].replace('Z', ''),
+                'timestamp': self._timestamp(record['timestamp']),
                 'container_id': record['container_id'],
                 'service_name': record['service_name'],
                 'version': record['version'],
@@ -215,7 +450,7 @@ class DataTransformerService:
             success_rate = ((record['total_requests'] - record['failed_requests']) / record['total_requests'] * 100) if record['total_requests'] > 0 else 100
             
             transformed.append({
-                'timestamp': record['timestamp'].replace('Z', ''),
+                'timestamp': self._timestamp(record['timestamp']),
                 'service_name': record['service_name'],
                 'version': record['version'],
                 'environment': record['environment'],
@@ -233,70 +468,244 @@ class DataTransformerService:
         
         return transformed
     
-    def load_to_postgres(self, table_name, records):
-        """Load transformed data to PostgreSQL"""
+    def _insert_rows(self, cursor, table_name, records):
+        """Load transformed records (without committing); returns the rows actually inserted
+        
+        In merge mode rows are copied into a session temp table (never
+        WAL-logged) and merged with INSERT ... ON CONFLICT DO NOTHING, so
+        samples already in the table are skipped instead of failing the
+        load; retries and replays only cost the staging copy.
+        """
         if not records:
-            return
+            return 0
+        if self.load_mode == 'append':
+            self._write_rows(cursor, table_name, table_name, records)
+            return len(records)
+        
+        columns = ', '.join(records[0].keys())
+        stage = f"stage_{table_name}"
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DELETE ROWS
+            AS SELECT {columns} FROM {table_name} WITH NO DATA
+        """)
+        self._write_rows(cursor, table_name, stage, records)
+        cursor.execute(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {stage} ON CONFLICT DO NOTHING")
+        inserted = cursor.rowcount
+        cursor.execute(f"TRUNCATE {stage}")
+        with self._lock:
+            self.duplicate_count += len(records) - inserted
+        return inserted
+    
+    def _write_rows(self, cursor, table_name, target, records):
+        """Bulk insert records of table_name's shape into target
+        
+        Uses COPY when enabled, with execute_values as the fallback: a chunk
+        the encoder cannot render is inserted with it, and if the server
+        reports COPY as unsupported (e.g. behind a proxy without COPY
+        support) the chunk is rolled back to a savepoint and COPY is turned
+        off for every worker. Any other database error (bad data, unique
+        violations, a dropped connection) fails the load as it would with
+        INSERT, and COPY stays on.
+        """
+        if self.copy_loader:
+            cursor.execute("SAVEPOINT copy_load")
+            try:
+                self.copy_loader.load(cursor, table_name, records, target)
+                cursor.execute("RELEASE SAVEPOINT copy_load")
+                return
+            except (KeyError, TypeError, ValueError, struct.error) as e:
+                # Values the COPY encoder cannot render or pack (out of range): this chunk goes through INSERT
+                cursor.execute("ROLLBACK TO SAVEPOINT copy_load")
+                logger.warning(f"⚠️  Cannot COPY {table_name} rows ({e}), using INSERT for this chunk")
+            except psycopg2.NotSupportedError as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT copy_load")
+                logger.warning(f"⚠️  COPY into {target} failed, falling back to INSERT: {e}")
+                self.copy_loader = None
+        
+        # Get column names from first record
+        columns = list(records[0].keys())
+        
+        # Build INSERT query
+        insert_query = f"""
+            INSERT INTO {target} ({', '.join(columns)})
+            VALUES %s
+        """
         
+        # Tuples are produced page by page instead of as a second full copy
+        values = (tuple(record[col] for col in columns) for record in records)
+        execute_values(cursor, insert_query, values, page_size=1000)
+    
+    def load_to_postgres(self, table_name, records):
+        """Load transformed data to PostgreSQL; returns False if the load failed"""
         try:
-            cursor = self.conn.cursor()
-            
-            # Get column names from first record
-            columns = list(records[0].keys())
-            
-            # Build INSERT query
-            insert_query = f"""
-                INSERT INTO {table_name} ({', '.join(columns)})
-                VALUES %s
-            """
-            
-            # Prepare values
-            values = [tuple(record[col] for col in columns) for record in records]
-            
-            # Bulk insert
-            execute_values(cursor, insert_query, values)
+            inserted = self._insert_rows(self.conn.cursor(), table_name, records)
             self.conn.commit()
-            
-            self.transformed_count += len(records)
-            logger.info(f"✅ Loaded {len(records)} records to {table_name}")
-            
+            with self._lock:
+                self.transformed_count += inserted
+            logger.info(f"✅ Loaded {inserted} records to {table_name}")
+            return True
         except Exception as e:
             self.conn.rollback()
             logger.error(f"❌ Failed to load to {table_name}: {e}")
+            return False
+    
+    def _claim(self, cursor, topic_id, source, offset):
+        """Lock the topic's checkpoints for this transaction; False if another run moved source's"""
+        # Serializes loads of a topic across transformer instances until commit
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (topic_id,))
+        cursor.execute(f"SELECT byte_offset FROM {CHECKPOINT_TABLE} WHERE source = %s", (source,))
+        row = cursor.fetchone()
+        return (row[0] if row else 0) == offset
     
-    def run_etl(self):
-        """Run full ETL pipeline"""
+    def _advance(self, cursor, topic_id, source, offset):
+        cursor.execute(f"""
+            INSERT INTO {CHECKPOINT_TABLE} (source, topic, byte_offset, updated_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (source) DO UPDATE SET byte_offset = EXCLUDED.byte_offset, updated_at = EXCLUDED.updated_at
+        """, (source, topic_id, offset, datetime.utcnow()))
+    
+    def load_source(self, topic_id, name, offset, size, conn=None):
+        """Extract, transform and load the new part of one source in a single transaction
+        
+        Records flow through in chunks of chunk_size, so memory stays bounded
+        whatever the size of the source. The checkpoint is advanced in the
+        same transaction as the rows, so every byte is loaded exactly once
+        even if the load or the process fails. Returns the rows loaded; a
+        failed load is rolled back and raised.
+        """
+        conn = conn or self.conn
+        transform = self.transforms[topic_id]
+        segment = name.startswith(topic_prefix(topic_id))
+        cursor = conn.cursor()
+        try:
+            if not self._claim(cursor, topic_id, name, offset):
+                conn.rollback()
+                with self._lock:
+                    self.conflict_count += 1
+                logger.warning(f"⚠️  {name} was loaded by another run, skipping it")
+                return 0
+            
+            if segment:
+                chunks = ((records, size) for records in self._segment_chunks(name))
+            elif offset > size:
+                logger.warning(f"⚠️  {name} shrank below its checkpoint ({size} < {offset}), re-reading it")
+                chunks = self.extract_object(name, 0)
+            else:
+                chunks = self.extract_object(name, offset)
+            
+            end = size if segment else offset
+            loaded = 0
+            for records, end in chunks:
+                rows = transform(self.drop_invalid(topic_id, records))
+                loaded += self._insert_rows(cursor, topic_id, rows)
+                self._sample_memory()
+            
+            if end == offset:
+                conn.rollback()
+                return 0
+            self._advance(cursor, topic_id, name, end)
+            conn.commit()
+        except FileNotFoundError:
+            conn.rollback()
+            return 0
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        
+        with self._lock:
+            self.transformed_count += loaded
+            self.checkpointed_count += 1
+        return loaded
+    
+    def run_topic(self, topic_id, start=None, end=None):
+        """Load every source of a topic with new bytes on a pooled connection; returns the rows loaded
+        
+        Never raises: a failed source is logged and the topic moves on to
+        the next one, and the outcome lands in topic_stats, so one topic's
+        failure leaves the others' workers untouched.
+        """
+        started = time.perf_counter()
+        loaded = failed = 0
+        error = None
+        conn = None
+        try:
+            conn = self.pool.getconn()
+            sources = self.pending_sources(topic_id, start, end, conn)
+            for name, offset, size in sources:
+                try:
+                    loaded += self.load_source(topic_id, name, offset, size, conn)
+                except Exception as e:
+                    failed += 1
+                    error = f"{name}: {e}"
+                    logger.error(f"❌ Failed to load {name} to {topic_id}: {e}")
+                    if conn.closed:
+                        break
+            if sources:
+                logger.info(f"✅ Loaded {loaded} records to {topic_id} from {len(sources)} sources "
+                            f"in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            error = str(e)
+            logger.error(f"❌ Failed to find sources of {topic_id}: {e}")
+        finally:
+            if conn is not None:
+                # Rolled back if mid-transaction; a broken connection is closed instead of reused
+                self.pool.putconn(conn)
+        
+        with self._lock:
+            self.topic_stats[topic_id] = {
+                "rows_loaded": loaded,
+                "failed_sources": failed,
+                "seconds": round(time.perf_counter() - started, 3),
+                "error": error,
+                "finished_at": datetime.utcnow().isoformat()
+            }
+        return loaded
+    
+    def run_etl(self, start=None, end=None):
+        """Run incremental ETL over sources overlapping [start, end) (all when unset)
+        
+        Each topic runs on its own worker and connection, so a slow topic
+        only delays itself: the others commit as soon as they are done.
+        """
         logger.info("🔄 Starting ETL pipeline...")
+        started = time.perf_counter()
+        with self._lock:
+            self._cycle_peak_rss = _rss_bytes()
+        
+        futures = [self.executor.submit(self.run_topic, topic_id, start, end) for topic_id in self.transforms]
+        for future in futures:
+            future.result()
         
-        # Extract, Transform, Load - Server Metrics
-        server_records = self.extract_from_gcs("server_metrics.jsonl")
-        if server_records:
-            transformed = self.transform_server_metrics(server_records)
-            self.load_to_postgres("server_metrics", transformed)
-        
-        # Extract, Transform, Load - Container Metrics
-        container_records = self.extract_from_gcs("container_metrics.jsonl")
-        if container_records:
-            transformed = self.transform_container_metrics(container_records)
-            self.load_to_postgres("container_metrics", transformed)
-        
-        # Extract, Transform, Load - Service Metrics
-        service_records = self.extract_from_gcs("service_metrics.jsonl")
-        if service_records:
-            transformed = self.transform_service_metrics(service_records)
-            self.load_to_postgres("service_metrics", transformed)
-        
-        logger.info(f"✅ ETL pipeline complete: {self.transformed_count} total records")
+        self._sample_memory()
+        self.last_cycle_peak_rss = self._cycle_peak_rss
+        logger.info(f"✅ ETL pipeline complete in {time.perf_counter() - started:.1f}s: "
+                    f"{self.transformed_count} total records, peak RSS {self.last_cycle_peak_rss / 1e6:.0f} MB")
+    
+    def _sample_memory(self):
+        rss = _rss_bytes()
+        with self._lock:
+            self._cycle_peak_rss = max(self._cycle_peak_rss, rss)
     
     def get_stats(self):
         """Get transformation statistics"""
-        return {
-            "total_transformed": self.transformed_count,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        with self._lock:
+            return {
+                "total_transformed": self.transformed_count,
+                "invalid_skipped": self.invalid_count,
+                "sources_checkpointed": self.checkpointed_count,
+                "checkpoint_conflicts": self.conflict_count,
+                "duplicates_skipped": self.duplicate_count,
+                "peak_rss_mb_last_cycle": round(self.last_cycle_peak_rss / 1e6, 1),
+                "workers": self.workers,
+                "topics": {topic_id: dict(stats) for topic_id, stats in self.topic_stats.items()},
+                "timestamp": datetime.utcnow().isoformat()
+            }
     
     def close(self):
-        """Close database connection"""
+        """Stop the topic workers and close the database connections"""
+        self.executor.shutdown(wait=True)
         if self.conn:
-            self.conn.close()
-            logger.info("🔌 Database connection closed")
+            self.pool.closeall()
+            logger.info("🔌 Database connections closed")
+        self.store.close()
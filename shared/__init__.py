@@ -1,4 +1,24 @@
 """Shared utilities across microservices"""
+from .broker import MessageBroker, BrokerMessage, create_broker, broker_options_from_env
 from .gcp_pubsub import GCPPubSubBroker
+from .memory_broker import InMemoryBroker
+from .file_broker import FileLogBroker
+from .object_store import ObjectStore, ObjectInfo, create_store, store_options_from_env
+from .gcs_store import GCSObjectStore
+from .local_store import LocalObjectStore
 
-__all__ = ['GCPPubSubBroker']
+__all__ = [
+    'MessageBroker',
+    'BrokerMessage',
+    'create_broker',
+    'broker_options_from_env',
+    'GCPPubSubBroker',
+    'InMemoryBroker',
+    'FileLogBroker',
+    'ObjectStore',
+    'ObjectInfo',
+    'create_store',
+    'store_options_from_env',
+    'GCSObjectStore',
+    'LocalObjectStore'
+]
@@ -0,0 +1,171 @@
+"""
+Message Broker Interface
+Transport-agnostic publish/subscribe used by the generator and ingestion services
+"""
+
+import logging
+import os
+import threading
+
+from .codecs import JSON_ENCODING, encode_payload
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Logical topic IDs used throughout the pipeline mapped to transport-level names
+TOPIC_NAMES = {
+    'server_metrics': 'server-metrics',
+    'container_metrics': 'container-metrics',
+    'service_metrics': 'service-metrics'
+}
+
+
+class BrokerMessage:
+    """Delivered message with the same surface as a Pub/Sub subscriber message"""
+
+    def __init__(self, data, attributes=None, message_id=None, delivery_attempt=1,
+                 on_ack=None, on_nack=None):
+        self.data = data
+        self.attributes = attributes or {}
+        self.message_id = message_id
+        self.delivery_attempt = delivery_attempt
+        self._on_ack = on_ack
+        self._on_nack = on_nack
+        self._settled = False
+        self._lock = threading.Lock()
+
+    def _settle(self):
+        """Mark the message as acked/nacked; only the first call counts"""
+        with self._lock:
+            if self._settled:
+                return False
+            self._settled = True
+            return True
+
+    def ack(self):
+        """Acknowledge successful processing"""
+        if self._settle() and self._on_ack:
+            self._on_ack(self)
+
+    def nack(self):
+        """Request redelivery"""
+        if self._settle() and self._on_nack:
+            self._on_nack(self)
+
+
+class Subscription:
+    """Handle for a running subscription, mirrors a Pub/Sub streaming pull future"""
+
+    def __init__(self, name):
+        self.name = name
+        self._stop = threading.Event()
+        self.threads = []
+
+    @property
+    def cancelled(self):
+        return self._stop.is_set()
+
+    def cancel(self):
+        """Stop dispatching new messages"""
+        self._stop.set()
+
+    def result(self, timeout=None):
+        """Block until the subscription threads exit"""
+        for thread in self.threads:
+            thread.join(timeout)
+
+
+class MessageBroker:
+    """Base class for telemetry message brokers"""
+
+    topic_names = TOPIC_NAMES
+    # Payload encoding requested by publishers (see shared.codecs)
+    wire_format = JSON_ENCODING
+
+    def encode(self, topic_id, message):
+        """Serialize a message for the wire; returns (data, attributes)"""
+        return encode_payload(topic_id, message, self.wire_format)
+
+    def publish(self, topic_id, message):
+        """Publish message to topic"""
+        if topic_id not in self.topic_names:
+            logger.error(f"❌ Unknown topic: {topic_id}")
+            return None
+        data, attributes = self.encode(topic_id, message)
+        return self.publish_encoded(topic_id, data, attributes)
+
+    def publish_encoded(self, topic_id, data, attributes=None):
+        """Publish an already encoded payload with its attributes"""
+        raise NotImplementedError
+
+    def subscribe(self, topic_id, callback, subscription=None, max_outstanding=None):
+        """Start delivering messages of a topic to callback(message)
+
+        max_outstanding caps the messages delivered but not yet acked or
+        nacked (None: the backend's default).
+        """
+        raise NotImplementedError
+
+    def flush(self, timeout=None):
+        """Wait for pending publishes; returns the number still pending"""
+        return 0
+
+    def close(self, timeout=None):
+        """Release transport resources"""
+        return self.flush(timeout=timeout)
+
+    def get_stats(self) -> dict:
+        """Get broker statistics"""
+        return {}
+
+
+def create_broker(broker_type='gcp', project_id=None, **options):
+    """Build a broker from configuration
+
+    broker_type: 'gcp' (Pub/Sub), 'memory' (in-process queues) or 'file'
+    (append-only local log). Remaining options go to the broker constructor.
+    """
+    broker_type = (broker_type or 'gcp').lower()
+
+    if broker_type == 'gcp':
+        from .gcp_pubsub import GCPPubSubBroker
+        if not project_id:
+            raise ValueError("project_id is required for the GCP broker")
+        return GCPPubSubBroker(project_id, **options)
+    if broker_type == 'memory':
+        from .memory_broker import InMemoryBroker
+        return InMemoryBroker(**options)
+    if broker_type == 'file':
+        from .file_broker import FileLogBroker
+        return FileLogBroker(**options)
+
+    raise ValueError(f"Unknown broker type: {broker_type}")
+
+
+def broker_options_from_env(broker_type):
+    """Read constructor options for a broker type from environment variables"""
+    broker_type = (broker_type or 'gcp').lower()
+
+    wire_format = os.getenv('WIRE_FORMAT', JSON_ENCODING)
+
+    if broker_type == 'gcp':
+        return {
+            'wire_format': wire_format,
+            'batching': os.getenv('PUBSUB_BATCHING', 'false').lower() == 'true',
+            'max_messages': int(os.getenv('PUBSUB_BATCH_MAX_MESSAGES', 100)),
+            'max_bytes': int(os.getenv('PUBSUB_BATCH_MAX_BYTES', 1_000_000)),
+            'max_latency': float(os.getenv('PUBSUB_BATCH_MAX_LATENCY', 0.05))
+        }
+    if broker_type == 'memory':
+        return {
+            'wire_format': wire_format,
+            'capacity': int(os.getenv('BROKER_CAPACITY', 10_000))
+        }
+    if broker_type == 'file':
+        return {
+            'wire_format': wire_format,
+            'directory': os.getenv('BROKER_DIR', './data/broker'),
+            'fsync': os.getenv('BROKER_FSYNC', 'false').lower() == 'true'
+        }
+    return {}
@@ -0,0 +1,184 @@
+"""
+Telemetry Wire Codecs
+JSON and compact binary encodings negotiated through the 'encoding' message attribute
+"""
+
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+
+# Attribute naming the payload encoding; messages without it are JSON
+ENCODING_ATTRIBUTE = 'encoding'
+JSON_ENCODING = 'json'
+BINARY_ENCODING = 'tlm-bin/1'
+
+BINARY_VERSION = 1
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EPOCH_NAIVE = datetime(1970, 1, 1)
+
+# Dictionary-coded enum values; the code is the list index
+ENUMS = {
+    'status': ['healthy', 'warning', 'critical'],
+    'health': ['healthy', 'degraded', 'unhealthy']
+}
+
+# Field layout per topic. Types:
+#   ts   - ISO timestamp carried as int64 epoch microseconds
+#   cent - 2-decimal float carried as int32 hundredths
+#   int  - int32
+#   enum - uint8 code from ENUMS[field]
+#   str  - uint8 length + UTF-8 bytes
+SCHEMAS = {
+    'server_metrics': [
+        ('timestamp', 'ts'), ('server_id', 'str'), ('region', 'str'), ('environment', 'str'),
+        ('cpu_percent', 'cent'), ('memory_percent', 'cent'), ('memory_used_gb', 'cent'),
+        ('memory_total_gb', 'int'), ('disk_used_gb', 'int'), ('disk_total_gb', 'int'),
+        ('status', 'enum')
+    ],
+    'container_metrics': [
+        ('timestamp', 'ts'), ('container_id', 'str'), ('service_name', 'str'), ('version', 'str'),
+        ('environment', 'str'), ('cpu_percent', 'cent'), ('memory_mb', 'int'),
+        ('memory_limit_mb', 'int'), ('requests_per_sec', 'int'), ('response_time_ms', 'cent'),
+        ('error_count', 'int'), ('restart_count', 'int'), ('health', 'enum')
+    ],
+    'service_metrics': [
+        ('timestamp', 'ts'), ('service_name', 'str'), ('version', 'str'), ('environment', 'str'),
+        ('region', 'str'), ('total_requests', 'int'), ('failed_requests', 'int'),
+        ('error_rate_percent', 'cent'), ('avg_response_time_ms', 'cent'),
+        ('p95_response_time_ms', 'cent'), ('instances_running', 'int'),
+        ('cpu_avg_percent', 'cent'), ('memory_avg_percent', 'cent')
+    ]
+}
+
+_FIXED_FORMATS = {'ts': 'q', 'cent': 'i', 'int': 'i', 'enum': 'B'}
+
+
+def timestamp_to_micros(value: str) -> int:
+    """ISO-8601 timestamp (with or without 'Z') to epoch microseconds"""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def micros_to_timestamp(micros: int) -> str:
+    """Epoch microseconds to the generator's ISO format ('...Z', naive UTC)"""
+    return (EPOCH_NAIVE + timedelta(microseconds=micros)).isoformat() + 'Z'
+
+
+class BinaryTopicCodec:
+    """Binary layout of one topic: a fixed-width struct followed by strings"""
+
+    def __init__(self, topic_index, fields):
+        self.topic_index = topic_index
+        self.names = [name for name, _ in fields]
+        self.fixed = [(name, kind) for name, kind in fields if kind != 'str']
+        self.strings = [name for name, kind in fields if kind == 'str']
+        # Header: version, topic index; then fixed fields
+        self.struct = struct.Struct('<BB' + ''.join(_FIXED_FORMATS[kind] for _, kind in self.fixed))
+        self.enum_codes = {
+            name: {value: code for code, value in enumerate(ENUMS[name])}
+            for name, kind in fields if kind == 'enum'
+        }
+
+        # Decoding plan: value positions after unpacking (header occupies 0-1)
+        positions = {name: 2 + i for i, (name, _) in enumerate(self.fixed)}
+        positions.update({name: 2 + len(self.fixed) + i for i, name in enumerate(self.strings)})
+        self.order = [(name, positions[name]) for name in self.names]
+        self.conversions = [
+            (positions[name], kind, ENUMS.get(name))
+            for name, kind in self.fixed if kind in ('ts', 'cent', 'enum')
+        ]
+
+    def encode(self, record) -> bytes:
+        values = [BINARY_VERSION, self.topic_index]
+        for name, kind in self.fixed:
+            value = record[name]
+            if kind == 'ts':
+                values.append(timestamp_to_micros(value))
+            elif kind == 'cent':
+                values.append(round(value * 100))
+            elif kind == 'enum':
+                values.append(self.enum_codes[name][value])
+            else:
+                values.append(value)
+
+        parts = [self.struct.pack(*values)]
+        for name in self.strings:
+            encoded = record[name].encode('utf-8')
+            parts.append(bytes((len(encoded),)))
+            parts.append(encoded)
+        return b''.join(parts)
+
+    def decode(self, data, offset=0, iso_timestamps=True):
+        """Decode one record at offset; returns (record, next_offset)"""
+        values = list(self.struct.unpack_from(data, offset))
+        offset += self.struct.size
+
+        for name in self.strings:
+            length = data[offset]
+            values.append(str(data[offset + 1:offset + 1 + length], 'utf-8'))
+            offset += 1 + length
+
+        for index, kind, table in self.conversions:
+            if kind == 'ts':
+                if iso_timestamps:
+                    values[index] = micros_to_timestamp(values[index])
+            elif kind == 'cent':
+                values[index] = values[index] / 100
+            else:
+                values[index] = table[values[index]]
+
+        # Values are in fixed-then-string order; emit fields in schema order
+        return {name: values[index] for name, index in self.order}, offset
+
+
+_TOPIC_CODECS = [BinaryTopicCodec(index, fields) for index, fields in enumerate(SCHEMAS.values())]
+_CODECS_BY_TOPIC = dict(zip(SCHEMAS, _TOPIC_CODECS))
+
+
+def encode_binary(topic_id, record) -> bytes:
+    """Encode a record in the binary format; raises if it does not fit the schema"""
+    return _CODECS_BY_TOPIC[topic_id].encode(record)
+
+
+def decode_binary(data, iso_timestamps=True) -> dict:
+    """Decode a binary-encoded record"""
+    if data[0] != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary version: {data[0]}")
+    record, _ = _TOPIC_CODECS[data[1]].decode(data, 0, iso_timestamps)
+    return record
+
+
+def encode_payload(topic_id, record, encoding=JSON_ENCODING):
+    """Encode a record for the wire; returns (data, attributes)
+
+    Records that do not fit the binary schema (unknown topic, missing field,
+    enum value or out-of-range number) fall back to JSON. JSON payloads carry
+    no attribute so consumers predating the binary format still read them.
+    """
+    if encoding == BINARY_ENCODING:
+        try:
+            return encode_binary(topic_id, record), {ENCODING_ATTRIBUTE: BINARY_ENCODING}
+        except (KeyError, TypeError, ValueError, AttributeError, struct.error):
+            pass
+    return json.dumps(record).encode('utf-8'), {}
+
+
+def decode_payload(data, attributes=None, iso_timestamps=True):
+    """Decode a payload according to its encoding attribute (JSON by default)
+
+    iso_timestamps=False leaves binary timestamps as epoch microseconds.
+    """
+    encoding = (attributes or {}).get(ENCODING_ATTRIBUTE, JSON_ENCODING)
+    if encoding == BINARY_ENCODING:
+        return decode_binary(data, iso_timestamps)
+    if encoding == JSON_ENCODING:
+        return json.loads(data.decode('utf-8'))
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def decode_message(message):
+    """Decode a delivered broker/Pub/Sub message"""
+    return decode_payload(message.data, message.attributes)
@@ -0,0 +1,122 @@
+"""
+Columnar Segments
+Typed Parquet encoding of telemetry records (requires pyarrow)
+"""
+
+import io
+
+from .codecs import SCHEMAS, timestamp_to_micros
+
+PARQUET_EXTENSION = 'parquet'
+PARQUET_CONTENT_TYPE = 'application/vnd.apache.parquet'
+
+
+def require_pyarrow():
+    """Import pyarrow (with its Parquet module) or fail with an install hint"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Columnar segments require pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def arrow_schema(topic_id):
+    """Arrow schema of a topic's columnar segments
+
+    Field types follow shared.codecs.SCHEMAS: ts -> timestamp[us] (naive
+    UTC), cent -> float64, int -> int64, str/enum -> dictionary-encoded string.
+    """
+    pa = require_pyarrow()
+    types = {
+        'ts': pa.timestamp('us'),
+        'cent': pa.float64(),
+        'int': pa.int64(),
+        'enum': pa.dictionary(pa.int32(), pa.string()),
+        'str': pa.dictionary(pa.int32(), pa.string())
+    }
+    return pa.schema([pa.field(name, types[kind]) for name, kind in SCHEMAS[topic_id]])
+
+
+def _timestamp_column(pa, values):
+    """ISO strings (naive UTC, with or without 'Z') to a timestamp[us] array"""
+    strings = pa.array(values, type=pa.string())
+    try:
+        return strings.cast(pa.timestamp('us', tz='UTC')).cast(pa.timestamp('us'))
+    except pa.ArrowInvalid:
+        # Mixed offset styles: parse one by one
+        micros = [None if value is None else timestamp_to_micros(value) for value in values]
+        return pa.array(micros, type=pa.int64()).cast(pa.timestamp('us'))
+
+
+def records_to_table(topic_id, records):
+    """Build a typed Arrow table from record dicts
+
+    Missing fields become nulls; values of the wrong type raise
+    pyarrow.ArrowInvalid / ArrowTypeError.
+    """
+    pa = require_pyarrow()
+    schema = arrow_schema(topic_id)
+    columns = []
+    for name, kind in SCHEMAS[topic_id]:
+        values = [record.get(name) for record in records]
+        if kind == 'ts':
+            columns.append(_timestamp_column(pa, values))
+        elif kind in ('str', 'enum'):
+            columns.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            columns.append(pa.array(values, type=schema.field(name).type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def encode_parquet(topic_id, records, compression='snappy') -> bytes:
+    """Encode records as one Parquet file with dictionary pages and column statistics"""
+    pa = require_pyarrow()
+    table = records_to_table(topic_id, records)
+    sink = io.BytesIO()
+    pa.parquet.write_table(
+        table, sink,
+        compression=compression,
+        use_dictionary=True,
+        write_statistics=True
+    )
+    return sink.getvalue()
+
+
+def read_parquet(data, columns=None):
+    """Read a Parquet segment into an Arrow table, optionally only some columns"""
+    pa = require_pyarrow()
+    return pa.parquet.read_table(pa.BufferReader(data), columns=columns)
+
+
+def parquet_records(data, columns=None) -> list:
+    """Read a Parquet segment as record dicts (timestamps as naive UTC datetimes)"""
+    return read_parquet(data, columns).to_pylist()
+
+
+def iter_parquet_records(data, batch_size=5000, columns=None):
+    """Yield a Parquet segment's records in lists of up to batch_size dicts"""
+    pa = require_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(pa.BufferReader(data))
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pylist()
+
+
+def parquet_statistics(data) -> dict:
+    """Per-column (min, max) across all row groups, from the file footer only"""
+    pa = require_pyarrow()
+    metadata = pa.parquet.ParquetFile(pa.BufferReader(data)).metadata
+    stats = {}
+    for group in range(metadata.num_row_groups):
+        row_group = metadata.row_group(group)
+        for index in range(row_group.num_columns):
+            column = row_group.column(index)
+            if column.statistics is None or not column.statistics.has_min_max:
+                continue
+            low, high = column.statistics.min, column.statistics.max
+            name = column.path_in_schema
+            if name in stats:
+                low = min(low, stats[name][0])
+                high = max(high, stats[name][1])
+            stats[name] = (low, high)
+    return stats
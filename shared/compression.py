@@ -0,0 +1,87 @@
+"""
+Compression Codecs
+Byte-level compression shared by message envelopes and storage
+"""
+
+import gzip
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Codec names accepted in 'compression' attributes and configuration;
+# zstd only when the zstandard package is installed
+CODECS = ('gzip', 'zlib') + (('zstd',) if zstandard else ())
+
+DEFAULT_LEVELS = {'gzip': 6, 'zlib': 6, 'zstd': 3}
+
+# File name suffix of compressed storage objects
+EXTENSIONS = {'gzip': 'gz', 'zlib': 'zz', 'zstd': 'zst'}
+
+
+def _check(codec):
+    if codec not in CODECS:
+        if codec == 'zstd':
+            raise ValueError("zstd compression requires the zstandard package")
+        raise ValueError(f"Unsupported compression: {codec}")
+
+
+def compress(data: bytes, codec=None, level=None) -> bytes:
+    """Compress data with codec (None returns data unchanged)"""
+    if not codec:
+        return data
+    _check(codec)
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == 'gzip':
+        return gzip.compress(data, compresslevel=level)
+    if codec == 'zlib':
+        return zlib.compress(data, level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def decompress(data: bytes, codec=None) -> bytes:
+    """Reverse compress()"""
+    if not codec:
+        return data
+    _check(codec)
+    if codec == 'gzip':
+        return gzip.decompress(data)
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def decompress_stream(chunks, codec=None):
+    """Decompress an iterable of byte chunks incrementally, yielding output chunks"""
+    if not codec:
+        yield from chunks
+        return
+    _check(codec)
+
+    def new_decompressor():
+        if codec == 'gzip':
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if codec == 'zlib':
+            return zlib.decompressobj()
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    decompressor = new_decompressor()
+    for chunk in chunks:
+        while chunk:
+            output = decompressor.decompress(chunk)
+            if output:
+                yield output
+            # Concatenated members/frames: restart on the leftover input
+            chunk = decompressor.unused_data if decompressor.eof else b''
+            if decompressor.eof:
+                decompressor = new_decompressor()
+
+
+def codec_for_name(name):
+    """Compression codec implied by an object name's suffix, or None"""
+    for codec, extension in EXTENSIONS.items():
+        if name.endswith(f".{extension}"):
+            return codec
+    return None
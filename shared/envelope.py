@@ -0,0 +1,93 @@
+"""
+Message Envelopes
+Packs many telemetry records into one broker message
+"""
+
+import struct
+
+from .codecs import (BINARY_ENCODING, ENCODING_ATTRIBUTE, JSON_ENCODING,
+                     decode_payload, encode_payload)
+from .compression import compress, decompress
+
+ENVELOPE_ATTRIBUTE = 'envelope'
+ENVELOPE_VERSION = '1'
+RECORDS_ATTRIBUTE = 'records'
+COMPRESSION_ATTRIBUTE = 'compression'
+
+# Per-record header inside an envelope: payload length, encoding code
+RECORD_HEADER = struct.Struct('<IB')
+_ENCODING_CODES = {JSON_ENCODING: 0, BINARY_ENCODING: 1}
+_ENCODING_NAMES = {code: name for name, code in _ENCODING_CODES.items()}
+
+
+def _seal(parts, count, encoding, compression):
+    """Build the (data, attributes) of one envelope"""
+    attributes = {
+        ENVELOPE_ATTRIBUTE: ENVELOPE_VERSION,
+        RECORDS_ATTRIBUTE: str(count),
+        ENCODING_ATTRIBUTE: encoding
+    }
+    if compression:
+        attributes[COMPRESSION_ATTRIBUTE] = compression
+    return compress(b''.join(parts), compression), attributes
+
+
+def pack_records(topic_id, records, encoding=JSON_ENCODING, max_records=100,
+                 max_bytes=256_000, compression=None):
+    """Yield (data, attributes) envelopes of up to max_records / max_bytes each
+
+    max_bytes bounds the uncompressed body; a single record larger than the
+    budget still gets an envelope of its own. Records that do not fit the
+    binary schema are carried as JSON inside the same envelope.
+    """
+    parts = []
+    count = 0
+    size = 0
+    for record in records:
+        payload, attributes = encode_payload(topic_id, record, encoding)
+        code = _ENCODING_CODES[attributes.get(ENCODING_ATTRIBUTE, JSON_ENCODING)]
+        entry_size = RECORD_HEADER.size + len(payload)
+
+        if count and (count >= max_records or size + entry_size > max_bytes):
+            yield _seal(parts, count, encoding, compression)
+            parts, count, size = [], 0, 0
+
+        parts.append(RECORD_HEADER.pack(len(payload), code))
+        parts.append(payload)
+        count += 1
+        size += entry_size
+
+    if count:
+        yield _seal(parts, count, encoding, compression)
+
+
+def is_envelope(attributes) -> bool:
+    return bool(attributes) and ENVELOPE_ATTRIBUTE in attributes
+
+
+def unpack_envelope(data, attributes) -> list:
+    """Decode every record of an envelope"""
+    if attributes.get(ENVELOPE_ATTRIBUTE) != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported envelope version: {attributes.get(ENVELOPE_ATTRIBUTE)}")
+
+    body = memoryview(decompress(bytes(data), attributes.get(COMPRESSION_ATTRIBUTE)))
+    records = []
+    offset = 0
+    while offset < len(body):
+        length, code = RECORD_HEADER.unpack_from(body, offset)
+        offset += RECORD_HEADER.size
+        payload = body[offset:offset + length]
+        offset += length
+        records.append(decode_payload(bytes(payload), {ENCODING_ATTRIBUTE: _ENCODING_NAMES[code]}))
+
+    expected = int(attributes.get(RECORDS_ATTRIBUTE, len(records)))
+    if expected != len(records):
+        raise ValueError(f"Envelope declares {expected} records, found {len(records)}")
+    return records
+
+
+def decode_records(message) -> list:
+    """Decode a delivered message into its records (one unless it is an envelope)"""
+    if is_envelope(message.attributes):
+        return unpack_envelope(message.data, message.attributes)
+    return [decode_payload(message.data, message.attributes)]
@@ -0,0 +1,273 @@
+"""
+File Log Broker
+Append-only local log per topic with committed consumer offsets
+"""
+
+import collections
+import json
+import logging
+import os
+import struct
+import threading
+import time
+
+from .broker import BrokerMessage, MessageBroker, Subscription
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Frame header: attributes length, payload length (big-endian uint32)
+FRAME_HEADER = struct.Struct('>II')
+
+
+class FileLogBroker(MessageBroker):
+    """Append-only file log broker
+
+    Every topic is a single log file of length-prefixed frames under
+    directory. A message ID is the byte offset of its frame. Each
+    subscription keeps a committed offset in <subscription>.offset: the
+    position before the oldest message that has not been acked yet, so a
+    restarted consumer resumes without skipping unacked messages.
+    Producers and consumers can live in different processes, and several
+    producer processes may append to the same log.
+    """
+
+    def __init__(self, directory='./data/broker', fsync=False, poll_interval=0.1,
+                 max_outstanding=1000, commit_interval=1.0, wire_format='json'):
+        self.directory = directory
+        self.wire_format = wire_format
+        self.fsync = fsync
+        self.poll_interval = poll_interval
+        self.max_outstanding = max_outstanding
+        self.commit_interval = commit_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._writers = {}
+        self._write_locks = {topic_id: threading.Lock() for topic_id in self.topic_names}
+        self._lock = threading.Lock()
+        self.subscriptions = []
+        self.published_count = 0
+        self.acked_count = 0
+        self.redelivered_count = 0
+
+        logger.info(f"✅ File log broker ready: {os.path.abspath(directory)}")
+
+    def _log_path(self, topic_id):
+        return os.path.join(self.directory, f"{self.topic_names[topic_id]}.log")
+
+    def _offset_path(self, subscription):
+        return os.path.join(self.directory, f"{subscription}.offset")
+
+    def publish_encoded(self, topic_id, data, attributes=None):
+        """Append an encoded payload to the topic log; returns its offset as message ID"""
+        if topic_id not in self.topic_names:
+            logger.error(f"❌ Unknown topic: {topic_id}")
+            return None
+
+        payload = data
+        attributes = json.dumps(attributes).encode('utf-8') if attributes else b''
+        frame = FRAME_HEADER.pack(len(attributes), len(payload)) + attributes + payload
+
+        try:
+            with self._write_locks[topic_id]:
+                fd = self._writers.get(topic_id)
+                if fd is None:
+                    fd = os.open(self._log_path(topic_id), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                    self._writers[topic_id] = fd
+                # One O_APPEND write per frame keeps frames whole when several
+                # producer processes share a log
+                os.write(fd, frame)
+                offset = os.lseek(fd, 0, os.SEEK_CUR) - len(frame)
+                if self.fsync:
+                    os.fsync(fd)
+        except OSError as e:
+            logger.error(f"❌ Failed to publish: {e}")
+            return None
+
+        with self._lock:
+            self.published_count += 1
+        return str(offset)
+
+    def subscribe(self, topic_id, callback, subscription=None, max_outstanding=None):
+        """Tail the topic log from the committed offset and deliver to callback"""
+        if topic_id not in self.topic_names:
+            raise ValueError(f"Unknown topic: {topic_id}")
+
+        handle = Subscription(subscription or f"{self.topic_names[topic_id]}-sub")
+        consumer = _LogConsumer(self, topic_id, callback, handle, max_outstanding or self.max_outstanding)
+        thread = threading.Thread(target=consumer.run, name=handle.name, daemon=True)
+        handle.threads.append(thread)
+        thread.start()
+
+        self.subscriptions.append(handle)
+        logger.info(f"▶️  File log consumer started: {handle.name} @ offset {consumer.committed}")
+        return handle
+
+    def read_offset(self, subscription):
+        """Read the committed offset of a subscription"""
+        try:
+            with open(self._offset_path(subscription)) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def write_offset(self, subscription, offset):
+        """Atomically persist the committed offset of a subscription"""
+        path = self._offset_path(subscription)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def close(self, timeout=None):
+        """Stop consumers, commit their offsets and close log files"""
+        for handle in self.subscriptions:
+            handle.cancel()
+        for handle in self.subscriptions:
+            handle.result(timeout)
+        for topic_id, fd in list(self._writers.items()):
+            with self._write_locks[topic_id]:
+                os.close(fd)
+                del self._writers[topic_id]
+        return 0
+
+    def get_stats(self) -> dict:
+        """Get broker statistics"""
+        with self._lock:
+            return {
+                "published": self.published_count,
+                "acked": self.acked_count,
+                "redelivered": self.redelivered_count
+            }
+
+
+class _LogConsumer:
+    """Reads frames for one subscription and tracks which offsets are acked"""
+
+    def __init__(self, broker, topic_id, callback, handle, max_outstanding):
+        self.broker = broker
+        self.topic_id = topic_id
+        self.callback = callback
+        self.handle = handle
+
+        self.committed = broker.read_offset(handle.name)
+        self.position = self.committed
+        self._persisted = self.committed
+        self._last_commit = time.monotonic()
+
+        # offset -> [end_offset, acked] in delivery order
+        self._inflight = collections.OrderedDict()
+        self._redelivery = collections.deque()
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_outstanding)
+
+    def run(self):
+        path = self.broker._log_path(self.topic_id)
+        log_file = None
+        try:
+            while not self.handle.cancelled:
+                self._maybe_commit()
+
+                if self._redelivery:
+                    self._deliver(*self._redelivery.popleft())
+                    continue
+
+                if log_file is None:
+                    if not os.path.exists(path):
+                        time.sleep(self.broker.poll_interval)
+                        continue
+                    log_file = open(path, 'rb')
+                    log_file.seek(self.position)
+
+                frame = self._read_frame(log_file)
+                if frame is None:
+                    time.sleep(self.broker.poll_interval)
+                    continue
+
+                offset, end, attributes, data = frame
+                with self._lock:
+                    self._inflight[offset] = [end, False]
+                self._deliver(offset, attributes, data, 1)
+        finally:
+            if log_file is not None:
+                log_file.close()
+            self._maybe_commit(force=True)
+
+    def _read_frame(self, log_file):
+        """Read the next complete frame, or None at end of log"""
+        offset = self.position
+        log_file.seek(offset)
+        header = log_file.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return None
+
+        attr_len, data_len = FRAME_HEADER.unpack(header)
+        body = log_file.read(attr_len + data_len)
+        if len(body) < attr_len + data_len:
+            # Producer is mid-write; retry from the same offset later
+            return None
+
+        attributes = json.loads(body[:attr_len]) if attr_len else {}
+        data = body[attr_len:]
+        self.position = offset + FRAME_HEADER.size + attr_len + data_len
+        return offset, self.position, attributes, data
+
+    def _deliver(self, offset, attributes, data, attempt):
+        # Bound unacked messages so a slow callback applies backpressure
+        while not self._slots.acquire(timeout=0.5):
+            if self.handle.cancelled:
+                return
+
+        message = BrokerMessage(
+            data,
+            attributes=attributes,
+            message_id=str(offset),
+            delivery_attempt=attempt,
+            on_ack=self._on_ack,
+            on_nack=self._on_nack
+        )
+        try:
+            self.callback(message)
+        except Exception as e:
+            logger.error(f"❌ Subscriber callback failed: {e}")
+            message.nack()
+
+    def _on_ack(self, message):
+        offset = int(message.message_id)
+        with self._lock:
+            self._inflight[offset][1] = True
+            # Advance the committed offset past the contiguous acked prefix
+            while self._inflight:
+                head, (end, acked) = next(iter(self._inflight.items()))
+                if not acked:
+                    break
+                self._inflight.popitem(last=False)
+                self.committed = end
+        self._slots.release()
+        with self.broker._lock:
+            self.broker.acked_count += 1
+
+    def _on_nack(self, message):
+        self._redelivery.append(
+            (int(message.message_id), message.attributes, message.data, message.delivery_attempt + 1)
+        )
+        self._slots.release()
+        with self.broker._lock:
+            self.broker.redelivered_count += 1
+
+    def _maybe_commit(self, force=False):
+        """Persist the committed offset at most once per commit_interval"""
+        now = time.monotonic()
+        if not force and now - self._last_commit < self.broker.commit_interval:
+            return
+        self._last_commit = now
+
+        with self._lock:
+            committed = self.committed
+            if not self._inflight:
+                committed = self.committed = max(self.committed, self.position)
+        if committed != self._persisted:
+            self.broker.write_offset(self.handle.name, committed)
+            self._persisted = committed
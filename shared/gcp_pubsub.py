@@ -4,36 +4,74 @@ Cloud-native event streaming
 """
 
 from google.cloud import pubsub_v1
-import json
+from google.cloud.pubsub_v1.types import BatchSettings, FlowControl, LimitExceededBehavior, PublishFlowControl
+from google.api_core import exceptions as gexc
+from concurrent import futures
 import logging
+import threading
+
+from .broker import MessageBroker
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class GCPPubSubBroker:
+class GCPPubSubBroker(MessageBroker):
     """GCP Pub/Sub broker for event-driven streaming"""
-    
-    def __init__(self, project_id):
+
+    def __init__(self, project_id, batching=False, max_messages=100, max_bytes=1_000_000,
+                 max_latency=0.05, max_pending_messages=10_000, max_pending_bytes=100_000_000,
+                 wire_format='json'):
         self.project_id = project_id
-        self.publisher = pubsub_v1.PublisherClient()
-        
-        # Topic names
-        self.topic_names = {
-            'server_metrics': 'server-metrics',
-            'container_metrics': 'container-metrics',
-            'service_metrics': 'service-metrics'
-        }
-        
+        self.batching = batching
+        self.wire_format = wire_format
+
+        # Publish statistics (updated from background future callbacks)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.published_count = 0
+        self.failed_count = 0
+
+        if batching:
+            # Messages accumulate client-side until one of the limits is hit,
+            # then a whole batch goes out in a single request
+            batch_settings = BatchSettings(
+                max_messages=max_messages,
+                max_bytes=max_bytes,
+                max_latency=max_latency
+            )
+            # Bound the number of in-flight messages so a slow network blocks
+            # the producer instead of growing memory without limit
+            publisher_options = pubsub_v1.types.PublisherOptions(
+                flow_control=PublishFlowControl(
+                    message_limit=max_pending_messages,
+                    byte_limit=max_pending_bytes,
+                    limit_exceeded_behavior=LimitExceededBehavior.BLOCK
+                )
+            )
+            self.publisher = pubsub_v1.PublisherClient(
+                batch_settings=batch_settings,
+                publisher_options=publisher_options
+            )
+        else:
+            self.publisher = pubsub_v1.PublisherClient()
+
+        # Subscriber client is only created by consumers
+        self.subscriber = None
+
         # Topic paths
         self.topics = {
             topic_id: f'projects/{project_id}/topics/{name}'
             for topic_id, name in self.topic_names.items()
         }
-        
+
         logger.info(f"✅ Connected to GCP Project: {project_id}")
+        if batching:
+            logger.info(
+                f"📦 Batched publishing: {max_messages} msgs / {max_bytes} bytes / {max_latency}s"
+            )
         self._ensure_topics_exist()
-    
+
     def _ensure_topics_exist(self):
         """Create topics if they don't exist"""
         for topic_id, topic_path in self.topics.items():
@@ -45,19 +83,108 @@ class GCPPubSubBroker:
                     logger.info(f"📌 Topic exists: {self.topic_names[topic_id]}")
                 else:
                     logger.error(f"❌ Error creating topic: {e}")
-    
-    def publish(self, topic_id, message):
-        """Publish message to topic"""
+
+    def publish_encoded(self, topic_id, data, attributes=None):
+        """Publish an encoded payload to topic
+
+        Blocks until the message ID is known unless batching is enabled, in
+        which case the publish future is returned immediately and resolved
+        in the background.
+        """
         topic_path = self.topics.get(topic_id)
         if not topic_path:
             logger.error(f"❌ Unknown topic: {topic_id}")
             return None
-        
+
         try:
-            message_json = json.dumps(message).encode('utf-8')
-            future = self.publisher.publish(topic_path, message_json)
+            future = self.publisher.publish(topic_path, data, **(attributes or {}))
+
+            if self.batching:
+                with self._lock:
+                    self._pending.add(future)
+                future.add_done_callback(self._on_publish_done)
+                return future
+
             message_id = future.result()
+            with self._lock:
+                self.published_count += 1
             return message_id
         except Exception as e:
+            with self._lock:
+                self.failed_count += 1
             logger.error(f"❌ Failed to publish: {e}")
             return None
+
+    def _on_publish_done(self, future):
+        """Record the outcome of a background publish"""
+        error = future.exception()
+        with self._lock:
+            self._pending.discard(future)
+            if error is None:
+                self.published_count += 1
+            else:
+                self.failed_count += 1
+        if error is not None:
+            logger.error(f"❌ Failed to publish: {error}")
+
+    def subscribe(self, topic_id, callback, subscription=None, max_outstanding=None, flow_control=None):
+        """Ensure the subscription exists and start a streaming pull consumer
+
+        max_outstanding sets the streaming pull's FlowControl.max_messages
+        (client default 1000); flow_control overrides it entirely.
+        """
+        topic_path = self.topics.get(topic_id)
+        if not topic_path:
+            raise ValueError(f"Unknown topic: {topic_id}")
+
+        if self.subscriber is None:
+            self.subscriber = pubsub_v1.SubscriberClient()
+
+        sub_name = subscription or f"{self.topic_names[topic_id]}-sub"
+        sub_path = f'projects/{self.project_id}/subscriptions/{sub_name}'
+        try:
+            self.subscriber.create_subscription(request={'name': sub_path, 'topic': topic_path})
+            logger.info(f"📬 Created subscription: {sub_name}")
+        except gexc.AlreadyExists:
+            logger.info(f"📬 Subscription exists: {sub_name}")
+
+        if flow_control is None and max_outstanding:
+            flow_control = FlowControl(max_messages=max_outstanding)
+        if flow_control is not None:
+            future = self.subscriber.subscribe(sub_path, callback=callback, flow_control=flow_control)
+        else:
+            future = self.subscriber.subscribe(sub_path, callback=callback)
+        logger.info(f"▶️  Streaming consumer started: {sub_name}")
+        return future
+
+    def flush(self, timeout=None):
+        """Wait for all pending publishes to resolve
+
+        Returns the number of futures still pending when the timeout expired.
+        """
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return 0
+
+        _, not_done = futures.wait(pending, timeout=timeout)
+        if not_done:
+            logger.warning(f"⚠️  {len(not_done)} messages still pending after flush")
+        return len(not_done)
+
+    def close(self, timeout=None):
+        """Drain pending messages and shut down the publisher"""
+        # stop() sends any partially filled batches and rejects new publishes
+        self.publisher.stop()
+        remaining = self.flush(timeout=timeout)
+        logger.info(f"🔌 Publisher closed ({self.published_count} published, {self.failed_count} failed)")
+        return remaining
+
+    def get_stats(self) -> dict:
+        """Get publish statistics"""
+        with self._lock:
+            return {
+                "published": self.published_count,
+                "failed": self.failed_count,
+                "pending": len(self._pending)
+            }
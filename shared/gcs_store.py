@@ -0,0 +1,138 @@
+"""
+GCS Object Store
+Cloud Storage bucket implementation of the object store interface
+"""
+
+import logging
+import threading
+
+from google.cloud import storage
+from google.api_core import exceptions as gexc
+
+from .object_store import STREAM_CHUNK_SIZE, ObjectInfo, ObjectStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class GCSObjectStore(ObjectStore):
+    """Object store backed by an existing Cloud Storage bucket"""
+
+    def __init__(self, project_id, bucket_name):
+        self.project_id = project_id
+        self.bucket_name = bucket_name
+        self.client = storage.Client(project=project_id)
+        self.bucket = self._get_bucket()
+
+        self._lock = threading.Lock()
+        self.objects_written = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+        logger.info(f"✅ Connected to GCS Bucket: {bucket_name}")
+
+    def _get_bucket(self):
+        """Use existing bucket; require it to be pre-created."""
+        try:
+            bucket = self.client.get_bucket(self.bucket_name)
+            logger.info(f"📦 Bucket exists: {self.bucket_name}")
+            return bucket
+        except gexc.NotFound:
+            logger.error(
+                f"❌ Bucket '{self.bucket_name}' not found. Create it first or grant bucket create permissions."
+            )
+            raise
+        except gexc.Forbidden:
+            logger.error(
+                f"❌ No permission to access bucket '{self.bucket_name}'. Grant storage access to the service account."
+            )
+            raise
+
+    def _written(self, size):
+        with self._lock:
+            self.objects_written += 1
+            self.bytes_written += size
+
+    def _read(self, size):
+        with self._lock:
+            self.bytes_read += size
+
+    def put(self, name, data, content_type=None):
+        """Upload an object, replacing any existing one"""
+        self.bucket.blob(name).upload_from_string(data, content_type=content_type)
+        self._written(len(data))
+
+    def append_segment(self, name, data, content_type=None):
+        """Upload a new object with a create-only precondition"""
+        try:
+            # if_generation_match=0: fails if any generation of the object exists
+            self.bucket.blob(name).upload_from_string(data, content_type=content_type, if_generation_match=0)
+        except gexc.PreconditionFailed:
+            raise FileExistsError(name)
+        self._written(len(data))
+
+    def list(self, prefix=''):
+        """List objects under prefix"""
+        blobs = self.client.list_blobs(self.bucket, prefix=prefix)
+        return sorted(
+            (ObjectInfo(blob.name, blob.size, blob.updated) for blob in blobs),
+            key=lambda info: info.name
+        )
+
+    def stat(self, name) -> ObjectInfo:
+        blob = self.bucket.get_blob(name)
+        if blob is None:
+            raise FileNotFoundError(name)
+        return ObjectInfo(blob.name, blob.size, blob.updated)
+
+    def get(self, name, start=0, end=None) -> bytes:
+        """Download an object or a byte range of it"""
+        if end is not None and end <= start:
+            return b''
+        try:
+            # GCS ranges are inclusive of the end byte
+            data = self.bucket.blob(name).download_as_bytes(
+                start=start or None, end=None if end is None else end - 1
+            )
+        except gexc.NotFound:
+            raise FileNotFoundError(name)
+        except gexc.RequestRangeNotSatisfiable:
+            return b''
+        self._read(len(data))
+        return data
+
+    def stream(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield an object's content through a chunked download"""
+        try:
+            with self.bucket.blob(name).open('rb', chunk_size=chunk_size) as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    self._read(len(chunk))
+                    yield chunk
+        except gexc.NotFound:
+            raise FileNotFoundError(name)
+
+    def exists(self, name) -> bool:
+        return self.bucket.blob(name).exists()
+
+    def delete(self, name):
+        try:
+            self.bucket.blob(name).delete()
+        except gexc.NotFound:
+            pass
+
+    def describe(self) -> str:
+        return f"gs://{self.bucket_name}"
+
+    def close(self):
+        self.client.close()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "objects_written": self.objects_written,
+                "bytes_written": self.bytes_written,
+                "bytes_read": self.bytes_read
+            }
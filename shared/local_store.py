@@ -0,0 +1,170 @@
+"""
+Local Object Store
+Directory-backed implementation of the object store interface
+"""
+
+import logging
+import mmap
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from .object_store import STREAM_CHUNK_SIZE, ObjectInfo, ObjectStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prefix of in-progress writes; never listed
+TEMP_PREFIX = '.tmp-'
+
+
+class LocalObjectStore(ObjectStore):
+    """Object store rooted at a local directory
+
+    An object 'a/b/c.jsonl' is the file <directory>/a/b/c.jsonl. Writes go
+    to a temporary file in the target directory and are published with an
+    atomic rename (put) or hard link (append_segment, which must not
+    replace an existing object), so readers never see partial objects.
+    Reads are served from memory maps. Several processes may share the
+    directory.
+    """
+
+    def __init__(self, directory='./data/storage', fsync=False):
+        self.directory = os.path.abspath(directory)
+        self.fsync = fsync
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.objects_written = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+        logger.info(f"✅ Local object store ready: {self.directory}")
+
+    def _path(self, name):
+        parts = name.split('/')
+        if not name or any(part in ('', '.', '..') for part in parts):
+            raise ValueError(f"Invalid object name: {name!r}")
+        return os.path.join(self.directory, *parts)
+
+    def _write_temp(self, path, data):
+        """Write data to a temporary file next to path; returns its path"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        temp = os.path.join(directory, f"{TEMP_PREFIX}{uuid.uuid4().hex}")
+        with open(temp, 'wb') as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        return temp
+
+    def _sync_directory(self, path):
+        if self.fsync:
+            fd = os.open(os.path.dirname(path), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _written(self, size):
+        with self._lock:
+            self.objects_written += 1
+            self.bytes_written += size
+
+    def put(self, name, data, content_type=None):
+        """Write an object, atomically replacing any existing one"""
+        path = self._path(name)
+        temp = self._write_temp(path, data)
+        try:
+            os.replace(temp, path)
+        except OSError:
+            os.unlink(temp)
+            raise
+        self._sync_directory(path)
+        self._written(len(data))
+
+    def append_segment(self, name, data, content_type=None):
+        """Write a new object; raises FileExistsError if the name is taken"""
+        path = self._path(name)
+        temp = self._write_temp(path, data)
+        try:
+            # link() fails instead of replacing an existing file
+            os.link(temp, path)
+        finally:
+            os.unlink(temp)
+        self._sync_directory(path)
+        self._written(len(data))
+
+    def list(self, prefix=''):
+        """List objects under prefix"""
+        # Only walk the deepest directory the prefix pins down
+        base = prefix.rsplit('/', 1)[0] if '/' in prefix else ''
+        root = os.path.join(self.directory, *base.split('/')) if base else self.directory
+
+        objects = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            relative = os.path.relpath(dirpath, self.directory)
+            relative = '' if relative == '.' else relative.replace(os.sep, '/') + '/'
+            for filename in filenames:
+                name = relative + filename
+                if filename.startswith(TEMP_PREFIX) or not name.startswith(prefix):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(dirpath, filename))
+                except FileNotFoundError:
+                    continue
+                updated = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+                objects.append(ObjectInfo(name, stat.st_size, updated))
+        objects.sort(key=lambda info: info.name)
+        return objects
+
+    def stat(self, name) -> ObjectInfo:
+        stat = os.stat(self._path(name))
+        return ObjectInfo(name, stat.st_size, datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc))
+
+    def get(self, name, start=0, end=None) -> bytes:
+        """Read an object or the byte range [start, end) of it"""
+        with open(self._path(name), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if end is None else min(end, size)
+            if start >= end:
+                return b''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                data = view[start:end]
+        with self._lock:
+            self.bytes_read += len(data)
+        return data
+
+    def stream(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield an object's content in chunks from a memory map"""
+        with open(self._path(name), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                for offset in range(0, len(view), chunk_size):
+                    chunk = view[offset:offset + chunk_size]
+                    with self._lock:
+                        self.bytes_read += len(chunk)
+                    yield chunk
+
+    def exists(self, name) -> bool:
+        return os.path.isfile(self._path(name))
+
+    def delete(self, name):
+        try:
+            os.unlink(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def describe(self) -> str:
+        return f"file://{self.directory}"
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "objects_written": self.objects_written,
+                "bytes_written": self.bytes_written,
+                "bytes_read": self.bytes_read
+            }
@@ -0,0 +1,120 @@
+"""
+Segment Manifests
+Per topic and partition index of segments with record counts, time bounds and checksums
+"""
+
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST_PREFIX = "_manifests"
+MANIFEST_CONTENT_TYPE = "application/json"
+
+
+def manifest_path(topic_id: str, partition: str, writer: str) -> str:
+    """Object name of one writer's manifest of a partition"""
+    return f"{MANIFEST_PREFIX}/{topic_id}/{partition}/{writer}.json"
+
+
+def manifest_prefix(topic_id: str, day: str = None) -> str:
+    """Prefix of a topic's manifests, or of one day's ('YYYY-MM-DD')"""
+    if day:
+        return f"{MANIFEST_PREFIX}/{topic_id}/dt={day}/"
+    return f"{MANIFEST_PREFIX}/{topic_id}/"
+
+
+def timestamp_key(value):
+    """Comparable form of a record timestamp: naive ISO string without 'Z'"""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None).isoformat()
+    if not isinstance(value, str):
+        return None
+    if value.endswith('Z'):
+        return value[:-1]
+    if value.endswith('+00:00'):
+        return value[:-6]
+    return value
+
+
+def checksum(data: bytes) -> str:
+    """Checksum of a stored segment's bytes"""
+    return f"crc32:{zlib.crc32(data):08x}"
+
+
+def segment_entry(path, data, records, min_ts, max_ts) -> dict:
+    """Manifest entry of a segment"""
+    return {
+        "path": path,
+        "records": records,
+        "bytes": len(data),
+        "min_ts": min_ts,
+        "max_ts": max_ts,
+        "checksum": checksum(data)
+    }
+
+
+def encode_manifest(topic_id, partition, writer, entries) -> bytes:
+    return json.dumps({
+        "topic": topic_id,
+        "partition": partition,
+        "writer": writer,
+        "updated_at": datetime.utcnow().isoformat() + "Z",
+        "segments": entries
+    }).encode("utf-8")
+
+
+def read_manifest(store, name) -> list:
+    """Segment entries of a stored manifest ([] if it does not exist)"""
+    try:
+        return json.loads(store.get(name))["segments"]
+    except FileNotFoundError:
+        return []
+
+
+def _days(start, end):
+    day = start.date()
+    while day <= end.date():
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def overlaps(entry, start=None, end=None) -> bool:
+    """Whether a segment may hold records in [start, end)"""
+    if start is not None and entry["max_ts"] is not None and entry["max_ts"] < timestamp_key(start):
+        return False
+    if end is not None and entry["min_ts"] is not None and entry["min_ts"] >= timestamp_key(end):
+        return False
+    return True
+
+
+def find_segments(store, topic_id, start=None, end=None, max_days=31, probe=True):
+    """Manifest entries of a topic's segments that overlap [start, end), oldest first
+
+    Returns None if the topic has no manifests (segments written before
+    manifests existed); probe=False skips that check for a topic known to
+    have them. With a start less than max_days ago (or before end) only
+    the manifests of those days are listed.
+    """
+    # An open end reaches tomorrow at most, for writers whose clocks run ahead
+    last = end if end is not None else datetime.utcnow() + timedelta(days=1)
+    if start is not None and (last - start).days < max_days:
+        prefixes = [manifest_prefix(topic_id, day) for day in _days(start, last)]
+    else:
+        prefixes = [manifest_prefix(topic_id)]
+
+    names = [info.name for prefix in prefixes for info in store.list(prefix) if info.name.endswith(".json")]
+    if not names and probe and not store.list(manifest_prefix(topic_id)):
+        return None
+
+    entries = []
+    for name in names:
+        try:
+            entries.extend(entry for entry in read_manifest(store, name) if overlaps(entry, start, end))
+        except (ValueError, KeyError) as e:
+            logger.error(f"❌ Unreadable manifest {name}: {e}")
+    entries.sort(key=lambda entry: (entry["min_ts"] or "", entry["path"]))
+    return entries
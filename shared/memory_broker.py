@@ -0,0 +1,167 @@
+"""
+In-Memory Broker
+Bounded in-process queues for benchmarks and single-process load tests
+"""
+
+import collections
+import itertools
+import logging
+import queue
+import threading
+
+from .broker import BrokerMessage, MessageBroker, Subscription
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBroker(MessageBroker):
+    """In-process broker with bounded per-topic queues
+
+    Each topic is a single queue shared by all of its subscribers (competing
+    consumers). When a queue is full, publish() blocks for up to
+    publish_timeout seconds, which applies backpressure to the producer;
+    with block=False a full queue rejects the message instead.
+    """
+
+    def __init__(self, capacity=10_000, block=True, publish_timeout=None, workers=1, wire_format='json'):
+        self.capacity = capacity
+        self.wire_format = wire_format
+        self.block = block
+        self.publish_timeout = publish_timeout
+        self.workers = workers
+
+        self.queues = {
+            topic_id: queue.Queue(maxsize=capacity)
+            for topic_id in self.topic_names
+        }
+        # Nacked messages bypass the bounded queue so a consumer never blocks on itself
+        self.redelivery = {topic_id: collections.deque() for topic_id in self.topic_names}
+        self.subscriptions = []
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published_count = 0
+        self.rejected_count = 0
+        self.acked_count = 0
+        self.redelivered_count = 0
+
+        logger.info(f"✅ In-memory broker ready (capacity {capacity} per topic)")
+
+    def publish_encoded(self, topic_id, data, attributes=None):
+        """Enqueue an encoded payload, blocking while the queue is full"""
+        topic_queue = self.queues.get(topic_id)
+        if topic_queue is None:
+            logger.error(f"❌ Unknown topic: {topic_id}")
+            return None
+
+        message_id = str(next(self._ids))
+        item = (message_id, data, dict(attributes or {}), 1)
+        try:
+            topic_queue.put(item, block=self.block, timeout=self.publish_timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected_count += 1
+            logger.warning(f"⚠️  Queue full, message rejected: {topic_id}")
+            return None
+
+        with self._lock:
+            self.published_count += 1
+        return message_id
+
+    def subscribe(self, topic_id, callback, subscription=None, max_outstanding=None):
+        """Start dispatcher threads delivering the topic queue to callback
+
+        With max_outstanding, delivery waits while that many messages of the
+        subscription are neither acked nor nacked.
+        """
+        topic_queue = self.queues.get(topic_id)
+        if topic_queue is None:
+            raise ValueError(f"Unknown topic: {topic_id}")
+
+        handle = Subscription(subscription or f"{self.topic_names[topic_id]}-sub")
+        slots = threading.Semaphore(max_outstanding) if max_outstanding else None
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._dispatch,
+                args=(topic_id, callback, handle, slots),
+                name=f"{handle.name}-{i}",
+                daemon=True
+            )
+            handle.threads.append(thread)
+            thread.start()
+
+        self.subscriptions.append(handle)
+        logger.info(f"▶️  In-memory consumer started: {handle.name}")
+        return handle
+
+    def _dispatch(self, topic_id, callback, handle, slots=None):
+        """Pull messages off a queue until the subscription is cancelled"""
+        topic_queue = self.queues[topic_id]
+        redelivery = self.redelivery[topic_id]
+        while not handle.cancelled:
+            if slots is not None and not slots.acquire(timeout=0.5):
+                continue
+            try:
+                item = redelivery.popleft()
+            except IndexError:
+                try:
+                    item = topic_queue.get(timeout=0.5)
+                except queue.Empty:
+                    if slots is not None:
+                        slots.release()
+                    continue
+            message_id, data, attributes, attempt = item
+
+            message = BrokerMessage(
+                data,
+                attributes=attributes,
+                message_id=message_id,
+                delivery_attempt=attempt,
+                on_ack=lambda msg, s=slots: self._on_ack(msg, s),
+                on_nack=lambda msg, t=topic_id, s=slots: self._on_nack(t, msg, s)
+            )
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"❌ Subscriber callback failed: {e}")
+                message.nack()
+
+    def _on_ack(self, message, slots=None):
+        with self._lock:
+            self.acked_count += 1
+        if slots is not None:
+            slots.release()
+
+    def _on_nack(self, topic_id, message, slots=None):
+        """Requeue a nacked message for redelivery"""
+        with self._lock:
+            self.redelivered_count += 1
+        self.redelivery[topic_id].append(
+            (message.message_id, message.data, message.attributes, message.delivery_attempt + 1)
+        )
+        if slots is not None:
+            slots.release()
+
+    def flush(self, timeout=None):
+        """Messages are enqueued synchronously; report what is still queued"""
+        return sum(q.qsize() for q in self.queues.values()) + sum(len(d) for d in self.redelivery.values())
+
+    def close(self, timeout=None):
+        """Stop all subscriptions"""
+        for handle in self.subscriptions:
+            handle.cancel()
+        for handle in self.subscriptions:
+            handle.result(timeout)
+        return self.flush()
+
+    def get_stats(self) -> dict:
+        """Get broker statistics"""
+        with self._lock:
+            return {
+                "published": self.published_count,
+                "rejected": self.rejected_count,
+                "acked": self.acked_count,
+                "redelivered": self.redelivered_count,
+                "queued": {topic_id: q.qsize() for topic_id, q in self.queues.items()}
+            }
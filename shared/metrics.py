@@ -0,0 +1,223 @@
+"""
+Metrics Registry
+Per-thread counters and histograms rendered in the Prometheus text format
+"""
+
+import bisect
+import threading
+import time
+
+# Latency buckets in seconds (Prometheus 'le' upper bounds)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _ThreadSharded:
+    """Base of metrics whose values live in one shard per writing thread
+
+    A thread only ever writes its own shard, so updates need no lock;
+    collection sums all shards. The lock is only taken when a thread
+    writes for the first time.
+    """
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshot(self):
+        with self._lock:
+            shards = list(self._shards)
+        # list() copies are atomic under the GIL while owners keep writing
+        return [list(shard.items()) for shard in shards]
+
+
+class Counter(_ThreadSharded):
+    """Monotonic counter with optional labels; by convention its name ends in _total"""
+
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        shard = self._shard()
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def values(self) -> dict:
+        """Label values -> total across threads"""
+        totals = {}
+        for items in self._snapshot():
+            for key, value in items:
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def total(self, *label_values):
+        """Total for one label combination, or over all of them when none is given"""
+        values = self.values()
+        if label_values:
+            return values.get(label_values, 0)
+        return sum(values.values())
+
+    def render(self):
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram(_ThreadSharded):
+    """Bucketed distribution (e.g. latency in seconds) with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        shard = self._shard()
+        state = shard.get(label_values)
+        if state is None:
+            # Per-bucket counts (+Inf last), sum, count
+            state = shard[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def time(self, *label_values):
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, label_values)
+
+    def values(self) -> dict:
+        """Label values -> (bucket counts, sum, count) across threads"""
+        merged = {}
+        for items in self._snapshot():
+            for key, (counts, total, count) in items:
+                current = merged.get(key)
+                if current is None:
+                    merged[key] = [list(counts), total, count]
+                else:
+                    current[0] = [a + b for a, b in zip(current[0], counts)]
+                    current[1] += total
+                    current[2] += count
+        return merged
+
+    def render(self):
+        for key, (counts, total, count) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                labels = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class _Timer:
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+
+
+class Gauge:
+    """Value read from a callback at collection time
+
+    The callback returns a number, or a dict of label values -> number.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.labels = tuple(labels)
+
+    def render(self):
+        value = self.function()
+        if isinstance(value, dict):
+            for key, item in sorted(value.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(item)}"
+        else:
+            yield f"{self.name} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """Named metrics of a process; asking for an existing name returns the same metric"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self._get(name, lambda: Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(name, lambda: Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, function, labels=()) -> Gauge:
+        """Register (or replace) a callback gauge"""
+        gauge = Gauge(name, documentation, function, labels)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# error collecting {metric.name}: {_escape(e)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide default registry
+REGISTRY = MetricsRegistry()
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
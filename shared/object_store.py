@@ -0,0 +1,111 @@
+"""
+Object Store Interface
+Storage-agnostic put/get/list used by the ingestion and transformer services
+"""
+
+import logging
+import os
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default chunk size for streaming reads
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class ObjectInfo:
+    """Listing entry: object name, size in bytes and last update time"""
+
+    __slots__ = ('name', 'size', 'updated')
+
+    def __init__(self, name, size, updated=None):
+        self.name = name
+        self.size = size
+        self.updated = updated
+
+    def __repr__(self):
+        return f"ObjectInfo({self.name!r}, {self.size})"
+
+
+class ObjectStore:
+    """Base class for object storage backends
+
+    Object names are '/'-separated paths. Missing objects raise
+    FileNotFoundError and append_segment() on an existing name raises
+    FileExistsError, whatever the backend.
+    """
+
+    def put(self, name, data, content_type=None):
+        """Create or replace an object"""
+        raise NotImplementedError
+
+    def append_segment(self, name, data, content_type=None):
+        """Create a new immutable object; never overwrites an existing one"""
+        raise NotImplementedError
+
+    def list(self, prefix=''):
+        """ObjectInfo of every object whose name starts with prefix, sorted by name"""
+        raise NotImplementedError
+
+    def stat(self, name) -> ObjectInfo:
+        """ObjectInfo of one object, without listing"""
+        raise NotImplementedError
+
+    def get(self, name, start=0, end=None) -> bytes:
+        """Read an object, or the byte range [start, end) of it"""
+        raise NotImplementedError
+
+    def stream(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield an object's content in chunks without loading it whole"""
+        raise NotImplementedError
+
+    def exists(self, name) -> bool:
+        """Whether an object exists"""
+        raise NotImplementedError
+
+    def delete(self, name):
+        """Remove an object if it exists"""
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        """Human-readable location for logs"""
+        return self.__class__.__name__
+
+    def close(self):
+        """Release backend resources"""
+
+    def get_stats(self) -> dict:
+        """Get storage statistics"""
+        return {}
+
+
+def create_store(storage_type='gcs', project_id=None, bucket_name=None, **options):
+    """Build an object store from configuration
+
+    storage_type: 'gcs' (Cloud Storage bucket) or 'local' (directory on
+    local disk). Remaining options go to the store constructor.
+    """
+    storage_type = (storage_type or 'gcs').lower()
+
+    if storage_type == 'gcs':
+        from .gcs_store import GCSObjectStore
+        if not bucket_name:
+            raise ValueError("bucket_name is required for the GCS store")
+        return GCSObjectStore(project_id, bucket_name, **options)
+    if storage_type == 'local':
+        from .local_store import LocalObjectStore
+        return LocalObjectStore(**options)
+
+    raise ValueError(f"Unknown storage type: {storage_type}")
+
+
+def store_options_from_env(storage_type):
+    """Read constructor options for a storage type from environment variables"""
+    storage_type = (storage_type or 'gcs').lower()
+
+    if storage_type == 'local':
+        return {
+            'directory': os.getenv('STORAGE_DIR', './data/storage'),
+            'fsync': os.getenv('STORAGE_FSYNC', 'false').lower() == 'true'
+        }
+    return {}
@@ -0,0 +1,26 @@
+"""
+Segment Layout
+Object naming shared by the ingestion writer, backfill and the transformer
+"""
+
+from datetime import datetime
+
+
+def topic_prefix(topic_id: str) -> str:
+    """Prefix under which all segments of a topic live"""
+    return f"{topic_id}/"
+
+
+def partition_for(timestamp) -> str:
+    """Hourly partition ('dt=YYYY-MM-DD/hr=HH') of an ISO timestamp
+
+    Unparseable timestamps land in the current hour.
+    """
+    if isinstance(timestamp, str) and len(timestamp) >= 13 and timestamp[10] == 'T':
+        return f"dt={timestamp[:10]}/hr={timestamp[11:13]}"
+    return datetime.utcnow().strftime("dt=%Y-%m-%d/hr=%H")
+
+
+def segment_path(topic_id: str, partition: str, instance: str, sequence: int, extension: str = "jsonl") -> str:
+    """Full object name of an immutable segment"""
+    return f"{topic_id}/{partition}/{instance}-{sequence:06d}.{extension}"
@@ -0,0 +1,150 @@
+"""
+Schema Validation
+Validators compiled once from a declarative per-topic schema
+"""
+
+from datetime import datetime
+
+from .codecs import ENUMS
+
+# Field rules per topic:
+#   type - 'ts' (ISO string or datetime), 'number', 'int', 'str' or 'enum' (value in ENUMS[field])
+#   min/max - inclusive numeric bounds
+# Every listed field is required: the transformer reads all of them.
+SCHEMA = {
+    'server_metrics': {
+        'fields': {
+            'timestamp': {'type': 'ts'},
+            'server_id': {'type': 'str'},
+            'region': {'type': 'str'},
+            'environment': {'type': 'str'},
+            'cpu_percent': {'type': 'number', 'min': 0, 'max': 100},
+            'memory_percent': {'type': 'number', 'min': 0, 'max': 100},
+            'memory_used_gb': {'type': 'number', 'min': 0},
+            'memory_total_gb': {'type': 'int', 'min': 1},
+            'disk_used_gb': {'type': 'int', 'min': 0},
+            'disk_total_gb': {'type': 'int', 'min': 1},
+            'status': {'type': 'enum'}
+        },
+        # (smaller, larger): record[smaller] <= record[larger]
+        'ordered': [('memory_used_gb', 'memory_total_gb'), ('disk_used_gb', 'disk_total_gb')]
+    },
+    'container_metrics': {
+        'fields': {
+            'timestamp': {'type': 'ts'},
+            'container_id': {'type': 'str'},
+            'service_name': {'type': 'str'},
+            'version': {'type': 'str'},
+            'environment': {'type': 'str'},
+            'cpu_percent': {'type': 'number', 'min': 0, 'max': 100},
+            'memory_mb': {'type': 'int', 'min': 0},
+            'memory_limit_mb': {'type': 'int', 'min': 1},
+            'requests_per_sec': {'type': 'int', 'min': 0},
+            'response_time_ms': {'type': 'number', 'min': 0},
+            'error_count': {'type': 'int', 'min': 0},
+            'restart_count': {'type': 'int', 'min': 0},
+            'health': {'type': 'enum'}
+        },
+        'ordered': [('memory_mb', 'memory_limit_mb')]
+    },
+    'service_metrics': {
+        'fields': {
+            'timestamp': {'type': 'ts'},
+            'service_name': {'type': 'str'},
+            'version': {'type': 'str'},
+            'environment': {'type': 'str'},
+            'region': {'type': 'str'},
+            'total_requests': {'type': 'int', 'min': 0},
+            'failed_requests': {'type': 'int', 'min': 0},
+            'error_rate_percent': {'type': 'number', 'min': 0, 'max': 100},
+            'avg_response_time_ms': {'type': 'number', 'min': 0},
+            'p95_response_time_ms': {'type': 'number', 'min': 0},
+            'instances_running': {'type': 'int', 'min': 0},
+            'cpu_avg_percent': {'type': 'number', 'min': 0, 'max': 100},
+            'memory_avg_percent': {'type': 'number', 'min': 0, 'max': 100}
+        },
+        'ordered': [('failed_requests', 'total_requests')]
+    }
+}
+
+_PYTHON_TYPES = {'number': (int, float), 'int': (int,), 'str': (str,), 'enum': (str,), 'ts': (str, datetime)}
+
+
+def _valid_timestamp(value) -> bool:
+    if isinstance(value, datetime):
+        return True
+    try:
+        datetime.fromisoformat(value[:-1] if value.endswith('Z') else value)
+        return True
+    except ValueError:
+        return False
+
+
+class SchemaValidator:
+    """Validator of one topic, compiled from its SCHEMA entry
+
+    The field rules are flattened once into tuples so checking a record is
+    a single pass without dictionary lookups into the schema.
+    """
+
+    def __init__(self, topic_id, schema=None):
+        schema = schema or SCHEMA[topic_id]
+        self.topic_id = topic_id
+        self.fields = tuple(schema['fields'])
+        self.plan = tuple(
+            (
+                name,
+                rule['type'],
+                _PYTHON_TYPES[rule['type']],
+                rule.get('min'),
+                rule.get('max'),
+                frozenset(ENUMS[name]) if rule['type'] == 'enum' else None
+            )
+            for name, rule in schema['fields'].items()
+        )
+        self.ordered = tuple(schema.get('ordered', ()))
+
+    def error(self, record):
+        """First problem with a record as 'field: problem', or None if it is valid"""
+        if not isinstance(record, dict):
+            return "record: not an object"
+
+        for name, kind, types, low, high, allowed in self.plan:
+            value = record.get(name)
+            if value is None:
+                return f"{name}: missing"
+            # bool is an int subclass but never a valid metric
+            if not isinstance(value, types) or value is True or value is False:
+                return f"{name}: {type(value).__name__}, expected {kind}"
+            if value != value:
+                return f"{name}: NaN"
+            if low is not None and value < low:
+                return f"{name}: {value} below {low}"
+            if high is not None and value > high:
+                return f"{name}: {value} above {high}"
+            if allowed is not None and value not in allowed:
+                return f"{name}: {value!r} not one of {sorted(allowed)}"
+            if kind == 'ts' and not _valid_timestamp(value):
+                return f"{name}: {value!r} is not an ISO timestamp"
+
+        for smaller, larger in self.ordered:
+            if record[smaller] > record[larger]:
+                return f"{smaller}: {record[smaller]} exceeds {larger}={record[larger]}"
+        return None
+
+    def validate(self, record) -> bool:
+        """Whether a record is valid"""
+        return self.error(record) is None
+
+    def validate_batch(self, records) -> list:
+        """Per-row error mask for a batch: None for valid rows, the error otherwise"""
+        error = self.error
+        return [error(record) for record in records]
+
+
+VALIDATORS = {topic_id: SchemaValidator(topic_id) for topic_id in SCHEMA}
+
+
+def validate_batch(topic_id, records) -> list:
+    """Per-row error mask of records of a topic (see SchemaValidator.validate_batch)"""
+    return VALIDATORS[topic_id].validate_batch(records)